@@ -1,18 +1,38 @@
 import sys
-import os
-import pydicom
 import numpy as np
 import vtk
 from vtkmodules.qt.QVTKRenderWindowInteractor import QVTKRenderWindowInteractor
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QPushButton,
                              QFileDialog, QWidget, QSlider, QLabel, QGridLayout, QSplitter,
-                             QToolBar, QInputDialog, QMessageBox, QComboBox, QSizePolicy)
-from PyQt6.QtGui import QIcon, QAction, QImage, QPixmap, QCursor, QPainter, QColor, QPen
-from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QPoint, QPointF,QSize
+                             QToolBar, QInputDialog, QMessageBox, QComboBox, QSizePolicy, QSpinBox,
+                             QProgressBar, QCheckBox, QListWidget, QListWidgetItem)
+from PyQt6.QtGui import QIcon, QAction, QPixmap, QCursor, QPainter, QColor, QPen
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QPoint, QPointF, QRectF, QSize
 
-import nibabel as nib
 import traceback
 import logging
+import time
+import threading
+from functools import partial
+
+from windowing import WindowLevelLUT
+from render_scheduler import RenderScheduler
+from slice_cache import SliceCache
+from prefetch import SlicePrefetcher
+from volume_layout import OrthogonalLayouts
+from pyramid import ImagePyramid
+from volume_3d import VolumePipeline3D
+from slice_planes_3d import SlicePlanes3D
+from oblique import ObliqueReslicer, rotation_matrix
+from orientation import Orientation, display_flip
+from slab import SlabProjector
+from volume_stats import VolumeStatistics
+from volume_cache import VolumeCache
+from roi_stats import IntegralVolume
+from image_io import numpy_to_qimage, rgba_to_qimage
+from label_overlay import LabelOverlay
+from perf_stats import PerfStats, NO_STAGE
+from volume_loader import VolumeLoadWorker, scan_dicom_job, decode_dicom_job, read_nifti_job, read_labels_job
 logging.basicConfig(level=logging.DEBUG)
 
 
@@ -23,21 +43,42 @@ class CrosshairImageLabel(QLabel):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.crosshair_position = QPointF(0, 0)
+        self.perf = None
+        self.overlay_text = None
+        self.roi_rect = None
+        self.roi_text = None
+        self.label_layer = None
         self.setMouseTracking(True)
 
     def paintEvent(self, event):
-        super().paintEvent(event)
-        if self.pixmap():
-            painter = QPainter(self)
-            painter.setPen(QPen(QColor(255, 0, 0), 1))  # Red color, 1px width
-
-            # Draw vertical line
-            painter.drawLine(QPointF(self.crosshair_position.x(), 0),
-                             QPointF(self.crosshair_position.x(), self.height()))
-
-            # Draw horizontal line
-            painter.drawLine(QPointF(0, self.crosshair_position.y()),
-                             QPointF(self.width(), self.crosshair_position.y()))
+        with self.perf.stage("paint") if self.perf is not None else NO_STAGE:
+            super().paintEvent(event)
+            if self.pixmap():
+                painter = QPainter(self)
+                if self.label_layer is not None:
+                    # Nearest-neighbour scaling keeps label edges on voxel boundaries
+                    image, target = self.label_layer
+                    painter.drawImage(target, image)
+                painter.setPen(QPen(QColor(255, 0, 0), 1))  # Red color, 1px width
+
+                # Draw vertical line
+                painter.drawLine(QPointF(self.crosshair_position.x(), 0),
+                                 QPointF(self.crosshair_position.x(), self.height()))
+
+                # Draw horizontal line
+                painter.drawLine(QPointF(0, self.crosshair_position.y()),
+                                 QPointF(self.width(), self.crosshair_position.y()))
+
+                if self.roi_rect is not None:
+                    painter.setPen(QPen(QColor(0, 255, 255), 1))
+                    painter.drawRect(self.roi_rect)
+                    if self.roi_text:
+                        painter.drawText(self.roi_rect.bottomLeft() + QPointF(0, 14), self.roi_text)
+
+                if self.overlay_text:
+                    painter.setPen(QColor(255, 255, 0))
+                    painter.drawText(self.rect().adjusted(6, 4, -6, -4),
+                                     Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft, self.overlay_text)
 
     def mousePressEvent(self, event):
         if self.pixmap():
@@ -75,6 +116,37 @@ class CrosshairImageLabel(QLabel):
 
 
 class EnhancedMultiViewMedicalImageViewer(QMainWindow):
+    layouts_ready = pyqtSignal()
+    pyramid_ready = pyqtSignal()
+    volume_stats_ready = pyqtSignal()
+    labels_ready = pyqtSignal()
+
+    slice_cache_limit_mb = 256
+    render_max_fps = 60  # Cap on 2D view repaints per second; 0 disables it
+    orthogonal_layouts = False
+    layout_limit_mb = 2048
+    pyramid_limit_mb = 1024
+    volume_backend = "auto"  # "auto", "gpu" or "cpu"
+    view_3d_mode = "volume"  # "volume" or "planes"
+    oblique_interpolation = 1  # 0 nearest, 1 trilinear; nearest is used while a tilt slider is dragged
+    slab_mode = None  # None, "mip", "minip" or "average"
+    slab_thickness = 10  # Slices
+    slab_limit_mb = 256
+    frame_cache_limit_mb = 1024  # Time frames of a 4D series kept in memory
+    frame_prefetch_depth = 4
+    roi_depth = 1  # Slices measured by an ROI; more than one makes it a cuboid
+    roi_index_limit_mb = 2048  # Summed-area index behind ROI statistics
+    label_opacity = 0.5
+    window_preset = "full"  # "full", "auto" or a WindowLevelLUT.CT_PRESETS name
+    auto_window_percentiles = (1.0, 99.0)
+    dicom_workers = None  # None uses one worker per CPU
+    dicom_use_processes = False
+    progressive_min_fraction = 0.25
+    nifti_cache_dir = None  # Decompressed .nii.gz files without the volume cache; None uses ~/.cache/mpr_viewer/nifti
+    volume_cache_dir = None  # None uses ~/.cache/mpr_viewer/volumes
+    volume_cache_limit_mb = 8192  # Decoded DICOM volumes and decompressed .nii.gz files on disk; 0 disables the cache
+    performance_overlay = False  # Stage timings are only collected while the overlay is on
+
     def __init__(self):
         super().__init__()
         self.current_view = "axial"
@@ -82,21 +154,95 @@ class EnhancedMultiViewMedicalImageViewer(QMainWindow):
         self.setGeometry(100, 100, 1200, 800)
         app_icon = QIcon("../assets/logo.png")
         self.setWindowIcon(app_icon)
+        self.slice_cache = SliceCache(self.slice_cache_limit_mb * 1024 * 1024)
+        self.prefetcher = SlicePrefetcher()
+        self.layouts = OrthogonalLayouts(self.layout_limit_mb * 1024 * 1024, self.orthogonal_layouts,
+                                         on_ready=self.layouts_ready.emit)
+        self.layouts_ready.connect(self.report_layouts)
+        self.pyramid = ImagePyramid(max_bytes=self.pyramid_limit_mb * 1024 * 1024, on_ready=self.pyramid_ready.emit)
+        self.pyramid_ready.connect(self.update_2d_views)
+        self.oblique = ObliqueReslicer()
+        self.oblique_angles = (0, 0)
+        self.oblique_order = self.oblique_interpolation
+        self.orientation = Orientation()
+        self.slab = SlabProjector(self.layouts.block, self.slab_limit_mb * 1024 * 1024)
+        self.volume_stats = VolumeStatistics(on_ready=self.volume_stats_ready.emit)
+        self.integral = IntegralVolume(self.roi_index_limit_mb * 1024 * 1024)
+        self.roi_mode = False
+        self.roi_box = None
+        self.roi_anchor = None
+        self.roi_stats = None
+        self.label_overlay = LabelOverlay(self.label_opacity, on_ready=self.labels_ready.emit)
+        self.labels_ready.connect(self.on_labels_ready)
+        self.label_source = None
+        self.label_images = {}
+        self.volume_stats_ready.connect(self.on_volume_stats_ready)
+        self.perf = PerfStats(enabled=self.performance_overlay)
+        self.volume_generation = 0
+        self.frame_count = 1
+        self.frame_index = 0
+        self.volume_cache = None
+        if self.volume_cache_limit_mb:
+            self.volume_cache = VolumeCache(self.volume_cache_dir, self.volume_cache_limit_mb * 1024 * 1024)
+            threading.Thread(target=self.volume_cache.remove_stale_parts, daemon=True).start()
+        self.frame_cache = SliceCache(self.frame_cache_limit_mb * 1024 * 1024)
+        self.frame_prefetcher = SlicePrefetcher(workers=1, depth=self.frame_prefetch_depth)
+        self.current_images = {}
+        self.displayed_keys = {}
+        self.plane_keys = {}
         self.image_data = None
+        self.voxel_spacing = (1.0, 1.0, 1.0)
+        self.intensity_scale = (1.0, 0.0)
+        self.volume_source = None
         self.current_slices = {"axial": 0, "sagittal": 0, "coronal": 0}
         self.cursor_position = {"axial": QPointF(0.5, 0.5), "sagittal": QPointF(0.5, 0.5), "coronal": QPointF(0.5, 0.5)}
         self.brightness = 1.0
         self.contrast = 1.0
+        self.window_level = WindowLevelLUT()
+        self.render_scheduler = RenderScheduler(self.update_single_view, max_fps=self.render_max_fps, parent=self)
         self.is_dragging = False
         self.pointer_mode = True
         self.last_mouse_pos = None
         self.pinned_points = {"axial": None, "sagittal": None, "coronal": None}
+        self.visible_rects = {}
+        self.pending_drag = None
+        self.last_drag = 0.0
+        self.drag_timer = QTimer(self)
+        self.drag_timer.setSingleShot(True)
+        self.drag_timer.timeout.connect(self.apply_pending_drag)
         self.setup_ui()
         self.zoom_factor = 1.0
 
 
 
 
+    @property
+    def image_data(self):
+        return self._image_data
+
+    @image_data.setter
+    def image_data(self, value):
+        self._image_data = value
+        self.volume_generation += 1
+        # Axis-contiguous copies and pyramid levels are rebuilt once the new volume is complete
+        self.layouts.set_volume(None)
+        self.pyramid.set_volume(None)
+        self.slab.set_volume(None)
+        self.volume_stats.set_volume(None)
+        self.integral.set_volume(None)
+        # Rendered slices belong to the previous array
+        if len(self.slice_cache):
+            logging.debug("Slice cache before reset: %s", self.slice_cache.stats())
+        self.slice_cache.clear()
+        self.current_images = {}
+
+    @property
+    def display_shape(self):
+        """
+        (z, y, x) shape of the volume as displayed, after the orientation is applied.
+        """
+        return self.orientation.shape(self.image_data.shape)
+
     def setup_ui(self):
         self.central_widget = QWidget(self)
         self.setCentralWidget(self.central_widget)
@@ -117,6 +263,7 @@ class EnhancedMultiViewMedicalImageViewer(QMainWindow):
         self.main_layout.addWidget(self.splitter)
 
         self.setup_vtk()
+        self.create_load_progress()
 
     def create_toolbar(self):
         toolbar = QToolBar()
@@ -163,8 +310,32 @@ class EnhancedMultiViewMedicalImageViewer(QMainWindow):
 
         self.create_slice_sliders()
         self.create_brightness_contrast_sliders()
+        self.create_oblique_controls()
+        self.create_slab_controls()
+        self.create_roi_controls()
+        self.create_label_controls()
         self.create_cine_controls()
 
+        self.backend_combo = QComboBox()
+        self.backend_combo.addItems(["Auto", "GPU", "CPU"])
+        self.backend_combo.setCurrentText(self.volume_backend.upper() if self.volume_backend != "auto" else "Auto")
+        self.backend_combo.currentTextChanged.connect(lambda text: self.volume_3d.set_backend(text.lower()))
+        self.mode_3d_combo = QComboBox()
+        self.mode_3d_combo.addItems(["Volume", "MPR Planes"])
+        self.mode_3d_combo.setCurrentText("MPR Planes" if self.view_3d_mode == "planes" else "Volume")
+        self.mode_3d_combo.currentTextChanged.connect(
+            lambda text: self.set_3d_mode("planes" if text == "MPR Planes" else "volume"))
+        self.side_layout.addWidget(QLabel("3D Rendering:"))
+        self.side_layout.addWidget(self.mode_3d_combo)
+        self.side_layout.addWidget(self.backend_combo)
+
+        self.layout_checkbox = QCheckBox("Contiguous Sagittal/Coronal Copies")
+        self.layout_checkbox.setChecked(self.orthogonal_layouts)
+        self.layout_checkbox.toggled.connect(self.toggle_orthogonal_layouts)
+        self.side_layout.addWidget(self.layout_checkbox)
+
+        self.create_performance_controls()
+
         # Add reset button
         self.reset_button = QPushButton("Reset All")
         self.reset_button.clicked.connect(self.reset_all)
@@ -203,6 +374,384 @@ class EnhancedMultiViewMedicalImageViewer(QMainWindow):
         self.side_layout.addWidget(QLabel("Contrast:"))
         self.side_layout.addWidget(self.contrast_slider)
 
+        self.window_preset_combo = QComboBox()
+        for name in ["full", "auto"] + list(WindowLevelLUT.CT_PRESETS):
+            self.window_preset_combo.addItem(name.replace("_", " ").title() if name != "full" else "Full Range", name)
+        self.window_preset_combo.setCurrentIndex(self.window_preset_combo.findData(self.window_preset))
+        self.window_preset_combo.currentIndexChanged.connect(
+            lambda index: self.set_window_preset(self.window_preset_combo.itemData(index)))
+        self.side_layout.addWidget(QLabel("Window Preset:"))
+        self.side_layout.addWidget(self.window_preset_combo)
+
+    def set_window_preset(self, preset):
+        self.window_preset = preset
+        self.apply_window_preset()
+
+    def apply_window_preset(self):
+        """
+        Set the display window from the current preset and return brightness and contrast
+        to neutral, so the sliders fine-tune the preset. The 3D transfer functions follow the
+        window. The auto window waits for the volume histogram.
+        """
+        if self.image_data is None or not self.volume_complete:
+            return
+        slope, intercept = self.intensity_scale
+        if self.window_preset == "full":
+            window = ()
+        elif self.window_preset == "auto":
+            if not self.volume_stats.ready:
+                return
+            window = [value * slope + intercept
+                      for value in self.volume_stats.percentile_window(*self.auto_window_percentiles)]
+        else:
+            center, width = WindowLevelLUT.CT_PRESETS[self.window_preset]
+            window = (center - width / 2, center + width / 2)
+        self.window_level.set_window(*window)
+        self.brightness_slider.setValue(100)
+        self.contrast_slider.setValue(100)
+        self.volume_3d.set_transfer_functions(*self.window_level.stored_window())
+        if self.view_3d_mode == "volume" and self.volume_3d.array is not None:
+            self.volume_3d.render()
+        self.update_2d_views()
+
+    def on_volume_stats_ready(self):
+        if not self.volume_stats.ready or self.volume_stats.volume is not self.image_data:
+            return
+        stats = self.volume_stats.stats()
+        logging.debug("Volume statistics: %s", stats)
+        # The loader's range may be an estimate (NIfTI samples a few slices); use the exact one
+        if self.volume_stats.value_range != (self.window_level.raw_min, self.window_level.raw_max):
+            self.window_level.set_volume(self.image_data, self.volume_stats.value_range, *self.intensity_scale)
+            self.apply_window_preset()
+        elif self.window_preset == "auto":
+            self.apply_window_preset()
+        slope, intercept = self.intensity_scale
+        low, high = (value * slope + intercept for value in self.volume_stats.percentile_window(1, 99))
+        self.statusBar().showMessage(f"Intensity 1-99%: {low:.0f} to {high:.0f}", 5000)
+
+    def create_oblique_controls(self):
+        self.oblique_sliders = []
+        for name in ["Axial Tilt X", "Axial Tilt Y"]:
+            slider = QSlider(Qt.Orientation.Horizontal)
+            slider.setRange(-90, 90)
+            slider.setValue(0)
+            slider.valueChanged.connect(self.update_oblique_angles)
+            # Nearest-neighbour sampling while dragging, full quality once released
+            slider.sliderPressed.connect(lambda: self.set_oblique_order(0))
+            slider.sliderReleased.connect(lambda: self.set_oblique_order(self.oblique_interpolation))
+            self.side_layout.addWidget(QLabel(f"{name}:"))
+            self.side_layout.addWidget(slider)
+            self.oblique_sliders.append(slider)
+
+    def create_slab_controls(self):
+        names = {None: "Off", "mip": "MIP", "minip": "MinIP", "average": "Average"}
+        self.slab_combo = QComboBox()
+        self.slab_combo.addItems(list(names.values()))
+        self.slab_combo.setCurrentText(names[self.slab_mode])
+        self.slab_combo.currentTextChanged.connect(
+            lambda text: self.set_slab(None if text == "Off" else text.lower(), self.slab_thickness))
+        self.slab_spin = QSpinBox()
+        self.slab_spin.setRange(1, 500)
+        self.slab_spin.setValue(self.slab_thickness)
+        self.slab_spin.setSuffix(" slices")
+        self.slab_spin.valueChanged.connect(lambda thickness: self.set_slab(self.slab_mode, thickness))
+        slab_layout = QHBoxLayout()
+        slab_layout.addWidget(self.slab_combo)
+        slab_layout.addWidget(self.slab_spin)
+        self.side_layout.addWidget(QLabel("Thick Slab:"))
+        self.side_layout.addLayout(slab_layout)
+
+    def set_slab(self, mode, thickness):
+        self.slab_mode = mode
+        self.slab_thickness = thickness
+        self.update_2d_views()
+
+    def slab_state(self, view_name):
+        """
+        (mode, thickness) of the slab projected in a view, or None for a single slice.
+        The oblique axial plane is always a single resliced plane.
+        """
+        if self.slab_mode is None or self.slab_thickness <= 1 or self.oblique_state(view_name) is not None:
+            return None
+        return self.slab_mode, self.slab_thickness
+
+    def create_roi_controls(self):
+        self.roi_checkbox = QCheckBox("ROI Tool")
+        self.roi_checkbox.toggled.connect(self.set_roi_mode)
+        self.roi_depth_spin = QSpinBox()
+        self.roi_depth_spin.setRange(1, 500)
+        self.roi_depth_spin.setValue(self.roi_depth)
+        self.roi_depth_spin.setSuffix(" slices")
+        self.roi_depth_spin.valueChanged.connect(self.set_roi_depth)
+        roi_clear_button = QPushButton("Clear")
+        roi_clear_button.clicked.connect(self.clear_roi)
+        roi_layout = QHBoxLayout()
+        roi_layout.addWidget(self.roi_checkbox)
+        roi_layout.addWidget(self.roi_depth_spin)
+        roi_layout.addWidget(roi_clear_button)
+        self.roi_label = QLabel()
+        self.side_layout.addWidget(QLabel("Region of Interest:"))
+        self.side_layout.addLayout(roi_layout)
+        self.side_layout.addWidget(self.roi_label)
+
+    def set_roi_mode(self, checked):
+        """
+        While the ROI tool is on, dragging in pointer mode draws a measurement box instead of
+        moving the crosshair.
+        """
+        self.roi_mode = checked
+
+    def set_roi_depth(self, depth):
+        # Applies to the next box drawn
+        self.roi_depth = depth
+
+    def clear_roi(self):
+        self.roi_box = None
+        self.roi_anchor = None
+        self.roi_stats = None
+        self.roi_label.clear()
+        self.update_2d_views()
+
+    def roi_voxel(self, view_name, pos):
+        """
+        Displayed (z, y, x) voxel under a position normalized to a view's pixmap.
+        """
+        image_pos = self.to_image_position(view_name, pos)
+        height, width = self.slice_shape(view_name)
+        column = min(int(image_pos.x() * width), width - 1)
+        row = min(int(image_pos.y() * height), height - 1)
+        index, last_z = self.current_slices[view_name], self.display_shape[0] - 1
+        # Sagittal and coronal rows run from the last slice down (display_flip)
+        return {"axial": (index, row, column), "sagittal": (last_z - row, column, index),
+                "coronal": (last_z - row, index, column)}[view_name]
+
+    def update_roi(self, view_name, pos):
+        """
+        Stretch the box from the voxel the drag started on to the one under pos. The box
+        spans roi_depth slices around the current slice of the view it is drawn in, and is
+        kept in stored voxels so it survives rotations and shows in every view it crosses.
+        """
+        if self.roi_anchor is None or self.roi_anchor[0] != view_name:
+            return
+        anchor, voxel = self.roi_anchor[1], self.roi_voxel(view_name, pos)
+        low = [min(a, b) for a, b in zip(anchor, voxel)]
+        high = [max(a, b) for a, b in zip(anchor, voxel)]
+        axis = Orientation.VIEW_AXIS[view_name]
+        start, stop = self.slab.slab_range(self.current_slices[view_name], self.roi_depth, self.display_shape[axis])
+        low[axis], high[axis] = start, stop - 1
+        corners = [self.orientation.to_source(corner, self.image_data.shape) for corner in (low, high)]
+        self.roi_box = tuple((int(min(a, b)), int(max(a, b)) + 1) for a, b in zip(*corners))
+        self.update_roi_stats()
+        self.update_2d_views()
+
+    def update_roi_stats(self):
+        """
+        Statistics of the ROI box in real intensities (slope and intercept applied).
+        """
+        if self.roi_box is None or self.image_data is None:
+            return
+        with self.perf.stage("roi"):
+            stats = self.integral.box_stats(self.roi_box, self.image_data)
+        slope, intercept = self.intensity_scale
+        low, high = sorted((stats["min"] * slope + intercept, stats["max"] * slope + intercept))
+        self.roi_stats = {"count": stats["count"], "mean": stats["mean"] * slope + intercept,
+                          "std": stats["std"] * abs(slope), "min": low, "max": high,
+                          "volume_mm3": stats["count"] * float(np.prod(self.voxel_spacing))}
+        self.roi_label.setText(f"Mean {self.roi_stats['mean']:.1f} ± {self.roi_stats['std']:.1f}\n"
+                               f"Min {low:g}, Max {high:g}\n"
+                               f"{stats['count']} voxels, {self.roi_stats['volume_mm3']:.1f} mm³")
+
+    def roi_rect(self, view_name, to_label):
+        """
+        Outline of the ROI box on a view's current slice in label pixels, or None when the
+        slice does not cross it. to_label maps positions normalized to the slice.
+        """
+        if self.roi_box is None or self.oblique_state(view_name) is not None:
+            return None
+        corners = [self.orientation.from_source(corner, self.image_data.shape)
+                   for corner in (tuple(low for low, _ in self.roi_box), tuple(high - 1 for _, high in self.roi_box))]
+        (z0, z1), (y0, y1), (x0, x1) = (sorted(pair) for pair in zip(*corners))
+        dim_z, dim_y, dim_x = self.display_shape
+        # (slice range, column range and count, row range and count) of each view
+        flipped_z = (dim_z - 1 - z1, dim_z - 1 - z0, dim_z)
+        layout = {"axial": ((z0, z1), (x0, x1, dim_x), (y0, y1, dim_y)),
+                  "sagittal": ((x0, x1), (y0, y1, dim_y), flipped_z),
+                  "coronal": ((y0, y1), (x0, x1, dim_x), flipped_z)}
+        (first, last), (column0, column1, width), (row0, row1, height) = layout[view_name]
+        if not first <= self.current_slices[view_name] <= last:
+            return None
+        return QRectF(to_label(column0 / width, row0 / height), to_label((column1 + 1) / width, (row1 + 1) / height))
+
+    def create_label_controls(self):
+        label_load_button = QPushButton("Load Label Map")
+        label_load_button.clicked.connect(self.load_label_file)
+        label_clear_button = QPushButton("Clear")
+        label_clear_button.clicked.connect(self.clear_labels)
+        self.label_checkbox = QCheckBox("Show")
+        self.label_checkbox.setChecked(True)
+        self.label_checkbox.toggled.connect(lambda checked: self.update_2d_views())
+        label_layout = QHBoxLayout()
+        label_layout.addWidget(label_load_button)
+        label_layout.addWidget(self.label_checkbox)
+        label_layout.addWidget(label_clear_button)
+        self.label_opacity_slider = QSlider(Qt.Orientation.Horizontal)
+        self.label_opacity_slider.setRange(0, 100)
+        self.label_opacity_slider.setValue(round(100 * self.label_opacity))
+        self.label_opacity_slider.valueChanged.connect(self.set_label_opacity)
+        # One checkable row per label value in the map; unchecking hides that label
+        self.label_list = QListWidget()
+        self.label_list.setMaximumHeight(100)
+        self.label_list.itemChanged.connect(self.on_label_item_changed)
+        self.side_layout.addWidget(QLabel("Label Map:"))
+        self.side_layout.addLayout(label_layout)
+        self.side_layout.addWidget(self.label_opacity_slider)
+        self.side_layout.addWidget(self.label_list)
+
+    def load_label_file(self):
+        file, _ = QFileDialog.getOpenFileName(self, "Select Label Map", "", "Image Files (*.nii *.nii.gz)")
+        if file:
+            self.load_label_map(file)
+
+    def load_label_map(self, file_path):
+        if self.image_data is None:
+            QMessageBox.warning(self, "No Image", "Load an image before its label map.")
+            return
+        self.start_loading(partial(read_labels_job, file_path, self.nifti_cache_dir, self.volume_cache),
+                           self.on_labels_loaded, "Loading label map...", "Failed to load label map")
+
+    def on_labels_loaded(self, result):
+        labels = result["labels"]
+        if self.image_data is None or labels.shape != self.image_data.shape:
+            result["source"].close()
+            shape = None if self.image_data is None else self.image_data.shape
+            QMessageBox.warning(self, "Label Map", f"The label map is {labels.shape} voxels but the image is {shape}.")
+            return
+        self.clear_labels()
+        self.label_source = result["source"]
+        self.label_overlay.set_labels(labels)
+        self.update_2d_views()
+
+    def on_labels_ready(self):
+        # From now on empty slices are skipped, and the labels present can be listed
+        self.label_list.blockSignals(True)
+        self.label_list.clear()
+        for value, count in sorted(self.label_overlay.present().items()):
+            swatch = QPixmap(12, 12)
+            swatch.fill(QColor(*self.label_overlay.color(value)))
+            item = QListWidgetItem(QIcon(swatch), f"{value} ({count} voxels)")
+            item.setData(Qt.ItemDataRole.UserRole, value)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked)
+            self.label_list.addItem(item)
+        self.label_list.blockSignals(False)
+        self.update_2d_views()
+
+    def on_label_item_changed(self, item):
+        self.label_overlay.set_label(item.data(Qt.ItemDataRole.UserRole),
+                                     visible=item.checkState() == Qt.CheckState.Checked)
+        self.update_2d_views()
+
+    def set_label_opacity(self, value):
+        if self.label_overlay.labels is None:
+            self.label_overlay.opacity = value / 100
+            return
+        self.label_overlay.set_opacity(value / 100)
+        self.update_2d_views()
+
+    def clear_labels(self):
+        if self.label_source is not None:
+            self.label_source.close()
+        self.label_source = None
+        self.label_overlay.set_labels(None)
+        self.label_images = {}
+        self.label_list.clear()
+        self.update_2d_views()
+
+    def label_layer(self, view_name, to_label):
+        """
+        The labels on a view's current slice as (RGBA image, target rectangle in label pixels),
+        or None when the slice has none. Only the labels' bounding box is colorized, cropped
+        from the stored slice before it is oriented; the result is kept per view until the
+        slice, orientation or lookup table changes.
+        """
+        overlay = self.label_overlay
+        if overlay.labels is None or not self.label_checkbox.isChecked() or self.oblique_state(view_name) is not None:
+            return None
+        index = self.current_slices[view_name]
+        key = (overlay.generation, overlay.version, overlay.ready, view_name, index, self.orientation.key())
+        cached = self.label_images.get(view_name)
+        if cached is not None and cached[0] == key:
+            layer = cached[1]
+        else:
+            source_view, source_index = self.orientation.source(view_name, index, overlay.labels.shape)
+            box = overlay.bounds(source_view, source_index)
+            layer = None
+            if box is not None:
+                with self.perf.stage("labels"):
+                    row0, row1, column0, column1 = box
+                    stored = overlay.slice(source_view, source_index)
+                    block = self.orientation.orient(view_name, stored[row0:row1 + 1, column0:column1 + 1])
+                    image = rgba_to_qimage(overlay.colorize(display_flip(view_name, block)))
+                size = self.orientation.orient(view_name, stored).shape
+                row0, row1, column0, column1 = self.orientation.orient_box(view_name, box, stored.shape)
+                if view_name != "axial":
+                    row0, row1 = size[0] - 1 - row1, size[0] - 1 - row0  # display_flip
+                layer = (image, (row0, row1, column0, column1), size)
+            self.label_images[view_name] = (key, layer)
+        if layer is None:
+            return None
+        image, (row0, row1, column0, column1), (height, width) = layer
+        return image, QRectF(to_label(column0 / width, row0 / height),
+                             to_label((column1 + 1) / width, (row1 + 1) / height))
+
+    def update_oblique_angles(self):
+        self.oblique_angles = tuple(slider.value() for slider in self.oblique_sliders)
+        if self.image_data is not None:
+            self.update_oblique_cursor()
+            self.render_scheduler.request("axial")
+
+    def set_oblique_order(self, order):
+        self.oblique_order = order
+        if self.oblique_state("axial") is not None:
+            self.render_scheduler.request("axial")
+
+    def oblique_state(self, view_name):
+        """
+        The oblique plane shown in the axial view, or None while it is axis-aligned: tilt angles,
+        interpolation order and the coronal and sagittal indices of the point it passes through.
+        """
+        if view_name != "axial" or self.oblique_angles == (0, 0) or self.image_data is None:
+            return None
+        return self.oblique_angles, self.oblique_order, self.current_slices["coronal"], self.current_slices["sagittal"]
+
+    def reslice_oblique(self, index, volume, level, oblique, orientation):
+        """
+        The plane is resliced in stored coordinates, then oriented like an axial slice.
+        """
+        angles, order, row, column = oblique
+        point = orientation.to_source((index, row, column), volume.shape)
+        data, level = self.pyramid.level_volume(volume, level)
+        scale = 2 ** level
+        spacing = tuple(spacing * scale for spacing in self.voxel_spacing)
+        image = self.oblique.reslice(data, tuple(value / scale for value in point), rotation_matrix(*angles),
+                                     spacing, order, fill=self.window_level.raw_min)
+        return orientation.orient("axial", image)
+
+    def oblique_point(self):
+        # The crosshair point in stored voxel coordinates
+        point = (self.current_slices["axial"], self.current_slices["coronal"], self.current_slices["sagittal"])
+        return self.orientation.to_source(point, self.image_data.shape)
+
+    def update_oblique_cursor(self):
+        # The crosshair point always lies in the oblique plane; place it in the axial view
+        if self.oblique_state("axial") is None:
+            return
+        dim_z, dim_y, dim_x = self.display_shape
+        row, column = self.oblique.to_plane(self.image_data.shape, self.voxel_spacing, self.oblique_point(),
+                                            rotation_matrix(*self.oblique_angles))
+        _, row, column = self.orientation.from_source((0, row, column), self.image_data.shape)
+        self.cursor_position["axial"] = QPointF(column / max(dim_x - 1, 1), row / max(dim_y - 1, 1))
+
     def create_view_area(self):
         self.view_area = QWidget()
         self.view_layout = QGridLayout(self.view_area)
@@ -227,6 +776,7 @@ class EnhancedMultiViewMedicalImageViewer(QMainWindow):
 
         # Connect mouse events and add borders
         for view in [self.axial_view, self.sagittal_view, self.coronal_view]:
+            view.perf = self.perf
             view.clicked.connect(self.handle_view_click)
             view.mouse_moved.connect(self.handle_mouse_move)
             view.setStyleSheet("border: 2px solid white; background-color: black;")
@@ -238,7 +788,8 @@ class EnhancedMultiViewMedicalImageViewer(QMainWindow):
         self.view_layout.addWidget(self.sagittal_view, 1, 1)
         self.view_layout.addWidget(QLabel("Coronal"), 2, 0, alignment=Qt.AlignmentFlag.AlignCenter)
         self.view_layout.addWidget(self.coronal_view, 3, 0)
-        self.view_layout.addWidget(QLabel("3D View"), 2, 1, alignment=Qt.AlignmentFlag.AlignCenter)
+        self.view_3d_title = QLabel("3D View")
+        self.view_layout.addWidget(self.view_3d_title, 2, 1, alignment=Qt.AlignmentFlag.AlignCenter)
         self.view_layout.addWidget(self.view_3d, 3, 1)
 
         # Set row and column stretches
@@ -265,13 +816,20 @@ class EnhancedMultiViewMedicalImageViewer(QMainWindow):
         if self.image_data is None:
             return
 
-        dim_z, dim_y, dim_x = self.image_data.shape
+        dim_z, dim_y, dim_x = self.display_shape
 
         # Update cursor position for the clicked view
         self.cursor_position[view_name] = QPointF(x, y)
 
         # Calculate voxel coordinates
-        if view_name == "axial":
+        if self.oblique_state(view_name) is not None:
+            _, row, column = self.orientation.to_source((0, y * (dim_y - 1), x * (dim_x - 1)), self.image_data.shape)
+            voxel = self.oblique.to_voxel(self.image_data.shape, self.voxel_spacing, self.oblique_point(),
+                                          rotation_matrix(*self.oblique_angles), row, column)
+            voxel = self.orientation.from_source(voxel, self.image_data.shape)
+            voxel_z, voxel_y, voxel_x = (min(max(int(round(value)), 0), size - 1)
+                                         for value, size in zip(voxel, self.display_shape))
+        elif view_name == "axial":
             voxel_x = int(x * (dim_x - 1))
             voxel_y = int(y * (dim_y - 1))
             voxel_z = self.current_slices["axial"]
@@ -284,28 +842,124 @@ class EnhancedMultiViewMedicalImageViewer(QMainWindow):
             voxel_y = self.current_slices["coronal"]
             voxel_z = int((1 - y) * (dim_z - 1))  # Invert Y for coronal view
 
+        self.set_cursor_voxel(voxel_z, voxel_y, voxel_x)
+
+    def set_cursor_voxel(self, voxel_z, voxel_y, voxel_x):
+        """
+        Move the crosshair to a voxel of the displayed volume and show the slices through it.
+        """
+        dim_z, dim_y, dim_x = (max(size - 1, 1) for size in self.display_shape)
+
         # Update current slices
         self.current_slices["axial"] = voxel_z
         self.current_slices["sagittal"] = voxel_x
         self.current_slices["coronal"] = voxel_y
 
         # Update cursor positions for other views
-        self.cursor_position["axial"] = QPointF(voxel_x / (dim_x - 1), voxel_y / (dim_y - 1))
-        self.cursor_position["sagittal"] = QPointF(voxel_y / (dim_y - 1), 1 - (voxel_z / (dim_z - 1)))
-        self.cursor_position["coronal"] = QPointF(voxel_x / (dim_x - 1), 1 - (voxel_z / (dim_z - 1)))
+        self.cursor_position["axial"] = QPointF(voxel_x / dim_x, voxel_y / dim_y)
+        self.cursor_position["sagittal"] = QPointF(voxel_y / dim_y, 1 - (voxel_z / dim_z))
+        self.cursor_position["coronal"] = QPointF(voxel_x / dim_x, 1 - (voxel_z / dim_z))
+        self.update_oblique_cursor()
 
         self.update_slice_sliders()
         self.update_2d_views()
+
     def update_single_view(self, view_name):
-        if self.image_data is None:
+        if self.image_data is None or not self.view_ready(view_name):
             return
 
-        if view_name == "axial":
-            self.display_2d_image(self.axial_view, self.image_data[self.current_slices["axial"], :, :], "axial")
-        elif view_name == "sagittal":
-            self.display_2d_image(self.sagittal_view, self.image_data[:, :, self.current_slices["sagittal"]], "sagittal")
-        elif view_name == "coronal":
-            self.display_2d_image(self.coronal_view, self.image_data[:, self.current_slices["coronal"], :], "coronal")
+        with self.perf.stage(f"frame.{view_name}"):
+            label = getattr(self, f"{view_name}_view")
+            level = self.display_level(view_name, label.size())
+            oblique = self.oblique_state(view_name)
+            slab = self.slab_state(view_name)
+            self.display_2d_image(label, view_name, level, oblique, slab)
+            plane_key = (self.slice_source_key(view_name, level, oblique, slab), self.window_level.version)
+            if self.view_3d_mode == "planes" and self.volume_complete and plane_key != self.plane_keys.get(view_name):
+                self.plane_keys[view_name] = plane_key
+                image = self.current_slice(view_name, level, oblique, slab)
+                transform = None
+                if oblique is not None:
+                    # Plane coordinates and world coordinates are both taken through the orientation
+                    orientation = self.orientation.matrix(self.image_data.shape, self.voxel_spacing)
+                    transform = orientation @ self.oblique.transform(
+                        self.image_data.shape, self.voxel_spacing, self.oblique_point(),
+                        rotation_matrix(*self.oblique_angles)) @ np.linalg.inv(orientation)
+                self.slice_planes.set_slice(view_name, self.current_slices[view_name],
+                                            self.apply_brightness_contrast(image), transform)
+
+    def slice_source_key(self, view_name, level=0, oblique=None, slab=None):
+        return (self.volume_generation, self.frame_index, view_name, self.current_slices[view_name], level, oblique,
+                slab, self.orientation.key())
+
+    def current_slice(self, view_name, level=0, oblique=None, slab=None):
+        """
+        The displayed slice of a view at its current index. It is extracted again only when
+        the index or anything else it is read from changed, so moving the crosshair within a
+        slice does not read the volume. Slices of a volume that is still loading are always re-read.
+        """
+        key = self.slice_source_key(view_name, level, oblique, slab)
+        current = self.current_images.get(view_name)
+        if current is not None and current[0] == key and self.volume_complete:
+            return current[1]
+        with self.perf.stage("extract"):
+            image = self.extract_slice(view_name, self.current_slices[view_name], level=level, oblique=oblique,
+                                       slab=slab)
+        self.current_images[view_name] = (key, image)
+        return image
+
+    def extract_slice(self, view_name, index, volume=None, level=0, oblique=None, orientation=None, slab=None):
+        """
+        Displayed slice at index: the matching stored slice, or the slab projection around it,
+        turned by the orientation.
+        """
+        volume = self.image_data if volume is None else volume
+        orientation = self.orientation if orientation is None else orientation
+        if oblique is not None:
+            return self.reslice_oblique(index, volume, level, oblique, orientation)
+        source_view, source_index = orientation.source(view_name, index, volume.shape)
+        if slab is not None:
+            mode, thickness = slab
+            image = self.slab.project(source_view, source_index, thickness, mode, volume)
+        elif level:
+            image = self.pyramid.extract(source_view, source_index, volume, level)
+        else:
+            image = self.layouts.extract(source_view, source_index, volume)
+        return orientation.orient(view_name, image)
+
+    def display_level(self, view_name, label_size):
+        """
+        Pyramid level matching the on-screen pixel density; full resolution once zoomed in.
+        Slabs are always projected from the full-resolution volume.
+        """
+        if self.slab_state(view_name) is not None:
+            return 0
+        height, width = self.slice_shape(view_name)
+        scale = min(label_size.width() * self.zoom_factor / width, label_size.height() * self.zoom_factor / height)
+        return self.pyramid.level_for(scale)
+
+    def volume_changed(self):
+        # Rebuild the derived copies of a complete volume in the background. Frames of a 4D
+        # series are read in place, so only the first frame's histogram is built for them.
+        derived = self.image_data if self.frame_count == 1 else None
+        self.layouts.set_volume(derived)
+        self.pyramid.set_volume(derived)
+        self.slab.set_volume(derived)
+        self.volume_stats.set_volume(self.image_data, (self.window_level.raw_min, self.window_level.raw_max))
+        self.integral.set_volume(derived, (self.window_level.raw_min, self.window_level.raw_max))
+
+    def toggle_orthogonal_layouts(self, checked):
+        self.layouts.set_enabled(checked)
+        if not checked:
+            self.report_layouts()
+
+    def report_layouts(self):
+        stats = self.layouts.stats()
+        timings = ", ".join(f"{view} {stats[view]['mean_ms']:.2f} ms ({stats[view]['layout']})"
+                            for view in ["axial", "sagittal", "coronal"])
+        self.statusBar().showMessage(f"Slice layouts: {stats['memory_bytes'] / 1024 ** 2:.0f} MB extra; {timings}",
+                                     5000)
+        logging.debug("Slice layouts: %s", stats)
 
     def view_mouse_release_event(self, event, view):
         self.is_dragging = False
@@ -331,15 +985,16 @@ class EnhancedMultiViewMedicalImageViewer(QMainWindow):
     def update_other_views(self, clicked_view):
         x, y = self.cursor_position[clicked_view].x(), self.cursor_position[clicked_view].y()
 
+        dim_z, dim_y, dim_x = self.display_shape
         if clicked_view == "axial":
-            self.update_slice('sagittal', int(x * (self.image_data.shape[2] - 1)))
-            self.update_slice('coronal', int(y * (self.image_data.shape[1] - 1)))
+            self.update_slice('sagittal', int(x * (dim_x - 1)))
+            self.update_slice('coronal', int(y * (dim_y - 1)))
         elif clicked_view == "sagittal":
-            self.update_slice('axial', int(y * (self.image_data.shape[0] - 1)))
-            self.update_slice('coronal', int(x * (self.image_data.shape[1] - 1)))
+            self.update_slice('axial', int(y * (dim_z - 1)))
+            self.update_slice('coronal', int(x * (dim_y - 1)))
         elif clicked_view == "coronal":
-            self.update_slice('axial', int(y * (self.image_data.shape[0] - 1)))
-            self.update_slice('sagittal', int(x * (self.image_data.shape[2] - 1)))
+            self.update_slice('axial', int(y * (dim_z - 1)))
+            self.update_slice('sagittal', int(x * (dim_x - 1)))
 
         self.update_2d_views()
 
@@ -348,6 +1003,13 @@ class EnhancedMultiViewMedicalImageViewer(QMainWindow):
         self.renderer = vtk.vtkRenderer()
         self.view_3d.GetRenderWindow().AddRenderer(self.renderer)
         self.interactor = self.view_3d.GetRenderWindow().GetInteractor()
+        self.volume_3d = VolumePipeline3D(self.view_3d.GetRenderWindow(), self.renderer, self.volume_backend)
+        self.volume_3d.attach_interactor(self.interactor)
+        self.volume_3d.on_frame = self.on_3d_frame
+        self.volume_3d.set_visible(self.view_3d_mode == "volume")
+        self.slice_planes = SlicePlanes3D(self.renderer)
+        self.slice_planes.set_visible(self.view_3d_mode == "planes")
+        self.render_scheduler.on_flushed = self.render_3d_planes
 
     def load_file(self):
         file_type, ok = QInputDialog.getItem(self, "Select File Type", "Choose file type:",
@@ -369,201 +1031,449 @@ class EnhancedMultiViewMedicalImageViewer(QMainWindow):
             self.load_nifti_file(file)
 
     def load_dicom_series(self, folder_path):
-        dicom_files = [os.path.join(folder_path, f) for f in os.listdir(folder_path) if f.endswith('.dcm')]
-        dicom_files.sort()
-
-        slices = [pydicom.dcmread(file) for file in dicom_files]
-        self.image_data = np.stack([s.pixel_array for s in slices])
-        self.initialize_views()
+        self.start_loading(partial(scan_dicom_job, folder_path, self.dicom_workers, self.volume_cache),
+                           self.on_dicom_scanned, "Reading DICOM headers...", "Failed to load DICOM series")
 
-        self.update_slice_sliders()
-        self.update_2d_views()
-        self.create_3d_view()
+    def on_dicom_scanned(self, series_list):
+        if not series_list:
+            QMessageBox.warning(self, "No DICOM Data", "No DICOM images were found in the selected folder.")
+            return
+        series = self.choose_dicom_series(series_list)
+        if series is None:
+            return
+        self.start_loading(partial(decode_dicom_job, series, self.dicom_workers, self.dicom_use_processes,
+                                   self.volume_cache),
+                           self.on_volume_loaded, f"Loading {series.description}...",
+                           "Failed to load DICOM series")
+
+    def choose_dicom_series(self, series_list):
+        if len(series_list) == 1:
+            return series_list[0]
+        names = [f"{series.description} ({len(series)} slices)" for series in series_list]
+        name, ok = QInputDialog.getItem(self, "Select Series", "The folder contains several series:", names, 0, False)
+        return series_list[names.index(name)] if ok else None
 
     def initialize_views(self):
         if self.image_data is not None:
             for view in ["axial", "sagittal", "coronal"]:
-                max_slice = self.image_data.shape[{"axial": 0, "sagittal": 2, "coronal": 1}[view]] - 1
+                max_slice = self.display_shape[{"axial": 0, "sagittal": 2, "coronal": 1}[view]] - 1
                 middle_slice = max_slice // 2
                 self.current_slices[view] = middle_slice
-                self.slice_sliders[view].setRange(0, max_slice)
-                self.slice_sliders[view].setValue(middle_slice)
-                self.slice_sliders[view].setEnabled(True)
+            self.update_slice_sliders()
             self.update_2d_views()
-            self.create_3d_view()
 
     def load_nifti_file(self, file_path):
-        try:
-            nifti_image = nib.load(file_path)
-            self.image_data = nifti_image.get_fdata()
+        self.start_loading(partial(read_nifti_job, file_path, self.nifti_cache_dir, self.volume_cache),
+                           self.on_volume_loaded, "Loading NIFTI file...", "Failed to load NIFTI file")
+
+    def create_load_progress(self):
+        self.load_worker = None
+        self.volume_complete = True
+        self.loaded_slice_count = 0
+        self.load_progress = QProgressBar()
+        self.load_progress.setMaximumWidth(200)
+        self.load_cancel_button = QPushButton("Cancel")
+        self.load_cancel_button.clicked.connect(self.cancel_loading)
+        self.statusBar().addPermanentWidget(self.load_progress)
+        self.statusBar().addPermanentWidget(self.load_cancel_button)
+        self.load_progress.hide()
+        self.load_cancel_button.hide()
+
+    def start_loading(self, job, on_finished, message, error_title):
+        """
+        Run a loading job on a background worker while the window stays responsive.
+        Signals from a worker that has since been replaced or cancelled are ignored.
+        """
+        self.cancel_loading()
+        worker = VolumeLoadWorker(job, parent=self)
+        worker.allocated.connect(lambda volume: self.on_volume_allocated(worker, volume))
+        worker.slice_loaded.connect(lambda index, done, total: self.on_slice_loaded(worker, index, done, total))
+        worker.finished.connect(partial(self.on_worker_finished, worker, on_finished))
+        worker.failed.connect(partial(self.on_worker_failed, worker, error_title))
+        worker.cancelled.connect(partial(self.on_loading_done, worker))
+        self.load_worker = worker
+
+        self.statusBar().showMessage(message)
+        self.load_progress.setRange(0, 0)  # Busy indicator until the slice count is known
+        self.load_progress.show()
+        self.load_cancel_button.show()
+        worker.start()
+
+    def cancel_loading(self):
+        worker, self.load_worker = self.load_worker, None
+        if worker is None:
+            return
+        # The job stops at its next poll; its last signal still reaches on_loading_done, which releases it
+        worker.cancel()
+        self.load_progress.hide()
+        self.load_cancel_button.hide()
+        if not self.volume_complete:
+            # A partially decoded volume is not kept
+            self.clear_volume()
+        self.statusBar().showMessage("Loading cancelled", 3000)
+
+    def on_loading_done(self, worker):
+        # Each worker emits exactly one of finished, failed or cancelled, so this is its last signal
+        worker.deleteLater()
+        if worker is not self.load_worker:
+            return False
+        self.load_worker = None
+        self.load_progress.hide()
+        self.load_cancel_button.hide()
+        self.statusBar().clearMessage()
+        return True
+
+    def on_worker_finished(self, worker, on_finished, result):
+        if self.on_loading_done(worker):
+            on_finished(result)
+
+    def on_worker_failed(self, worker, error_title, error):
+        if self.on_loading_done(worker):
+            if not self.volume_complete:
+                self.clear_volume()
+            QMessageBox.critical(self, "Error", f"{error_title}: {error}")
+
+    def clear_volume(self):
+        self.cine_timer.stop()
+        self.prefetcher.cancel()
+        self.render_scheduler.cancel()
+        self.image_data = None
+        self.orientation = Orientation()
+        self.volume_complete = True
+        for view in ["axial", "sagittal", "coronal"]:
+            getattr(self, f"{view}_view").clear()
+            self.slice_sliders[view].setEnabled(False)
+        self.volume_3d.clear()
+        self.slice_planes.clear()
+        self.frame_prefetcher.cancel()
+        if self.volume_source is not None:
+            self.volume_source.close()
+        self.volume_source = None
+        self.frame_cache.clear()
+        self.frame_count = 1
+        self.frame_index = 0
+        self.update_time_slider()
+        self.clear_roi()
+        self.clear_labels()
+
+    def on_volume_allocated(self, worker, volume):
+        if worker is not self.load_worker:
+            return
+        self.clear_volume()
+        self.volume_complete = False
+        self.loaded_slice_count = 0
+        self.image_data = volume
+        # The previous volume's table may not fit this dtype; a neutral one until the first slice arrives
+        self.window_level.set_volume(volume, WindowLevelLUT.dtype_range(volume.dtype))
+        self.initialize_views()
 
+    def on_slice_loaded(self, worker, index, done, total):
+        if worker is not self.load_worker:
+            return
+        self.loaded_slice_count = done
+        self.load_progress.setRange(0, total)
+        self.load_progress.setValue(done)
+
+        if done == 1:
+            # Provisional window from the first (middle) slice until the full range is known
+            self.window_level.set_volume(self.image_data[index])
+        if index == self.current_slices["axial"]:
+            self.render_scheduler.request("axial")
+        if self.view_ready("sagittal") and done % max(1, total // 20) == 0:
+            self.render_scheduler.request("sagittal", "coronal")
+
+    def on_volume_loaded(self, result):
+        volume = result["volume"]
+        if volume is not self.image_data:
+            self.clear_volume()
             # Handle incomplete data
-            if len(self.image_data.shape) < 3:
+            if len(volume.shape) < 3:
                 QMessageBox.warning(self, "Incomplete Data", "The NIFTI file appears to be incomplete. Some features may not work as expected.")
                 # Pad the data to 3D if necessary
-                while len(self.image_data.shape) < 3:
-                    self.image_data = np.expand_dims(self.image_data, axis=-1)
-
-            self.update_slice_sliders()
-            self.update_2d_views()
-            self.create_3d_view()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to load NIFTI file: {str(e)}")
+                while len(volume.shape) < 3:
+                    volume = np.expand_dims(volume, axis=-1)
+            self.image_data = volume
+            self.initialize_views()
+
+        self.volume_complete = True
+        self.voxel_spacing = result.get("spacing", (1.0, 1.0, 1.0))
+        self.volume_source = result.get("source")
+        self.frame_count = result.get("frame_count", 1)
+        self.frame_index = 0
+        self.update_time_slider()
+        # Stored values times slope plus intercept give real intensities (NIfTI scaling is not applied to the array)
+        self.intensity_scale = (result.get("slope", 1.0), result.get("intercept", 0.0))
+        self.window_level.set_volume(volume, result["value_range"], *self.intensity_scale)
+        self.volume_changed()
+        self.apply_window_preset()
+        self.update_2d_views()
+        # The 3D view is built once, after the whole volume is available
+        self.create_3d_view()
 
+    def view_ready(self, view_name):
+        """
+        While a volume is still loading, sagittal and coronal views are shown once
+        progressive_min_fraction of the slices are in.
+        """
+        if self.volume_complete or view_name == "axial":
+            return True
+        return self.loaded_slice_count >= self.progressive_min_fraction * self.image_data.shape[0]
 
     def update_slice_sliders(self):
         if self.image_data is not None:
             for view, slider in self.slice_sliders.items():
-                max_slice = self.image_data.shape[{"axial": 0, "sagittal": 2, "coronal": 1}[view]] - 1
+                max_slice = self.display_shape[{"axial": 0, "sagittal": 2, "coronal": 1}[view]] - 1
+                # Slider updates are bookkeeping only; repaints go through the render scheduler
+                slider.blockSignals(True)
                 slider.setRange(0, max_slice)
                 slider.setValue(self.current_slices[view])
+                slider.blockSignals(False)
                 slider.setEnabled(True)
 
     def update_slice(self, view, value):
         if self.image_data is not None:
-            max_slice = self.image_data.shape[{"axial": 0, "sagittal": 2, "coronal": 1}[view]] - 1
+            max_slice = self.display_shape[{"axial": 0, "sagittal": 2, "coronal": 1}[view]] - 1
             self.current_slices[view] = max(0, min(value, max_slice))
-            self.slice_sliders[view].setValue(self.current_slices[view])
-            self.update_single_view(view)
+            slider = self.slice_sliders[view]
+            slider.blockSignals(True)
+            slider.setValue(self.current_slices[view])
+            slider.blockSignals(False)
+            self.render_scheduler.request(view)
 
     def update_2d_views(self):
         if self.image_data is not None:
-            self.update_single_view("axial")
-            self.update_single_view("sagittal")
-            self.update_single_view("coronal")
-
-    def display_2d_image(self, label, image, view):
-        image = self.apply_brightness_contrast(image)
-
-        # Invert coronal and sagittal views
-        if view == "coronal":
-            image = np.flipud(image)  # Flip vertically
-        elif view == "sagittal":
-            image = np.flipud(image)  # Flip both vertically and horizontally
+            self.render_scheduler.request("axial", "sagittal", "coronal")
+
+    def slice_cache_key(self, view, index, label_size, window_level_version, source_rect, level, oblique=None,
+                        slab=None):
+        return (self.volume_generation, self.frame_index, view, index, window_level_version, self.zoom_factor,
+                label_size.width(), label_size.height(), source_rect, level, oblique, slab, self.orientation.key())
+
+    def slice_shape(self, view, level=0):
+        if level:
+            height, width = self.pyramid.slice_shape(self.orientation.source(view, 0, self.image_data.shape)[0], level)
+            # Only a turned axial slice swaps its rows and columns
+            return (width, height) if view == "axial" and self.orientation.axes[0] == 2 else (height, width)
+        dim_z, dim_y, dim_x = self.display_shape
+        return {"axial": (dim_y, dim_x), "sagittal": (dim_z, dim_y), "coronal": (dim_z, dim_x)}[view]
+
+    def visible_source_rect(self, view, image_shape, label_size, zoom_factor):
+        """
+        Region of a slice that is visible in a label at the given zoom, centred on the
+        view's cursor, as (x, y, width, height) in slice pixels, plus the on-screen
+        size it is resampled to.
+        """
+        height, width = image_shape
+        scale = min(label_size.width() * zoom_factor / width, label_size.height() * zoom_factor / height)
+        scaled_width, scaled_height = width * scale, height * scale
+        output_width = max(1, int(min(label_size.width(), scaled_width)))
+        output_height = max(1, int(min(label_size.height(), scaled_height)))
 
-        height, width = image.shape
-        bytes_per_line = width
+        cursor_x, cursor_y = self.cursor_position[view].x(), self.cursor_position[view].y()
 
-        # Convert the NumPy array to bytes
-        image_bytes = image.tobytes()
+        # Top-left corner of the visible portion, kept within the image
+        x = max(0.0, min(cursor_x * scaled_width - output_width / 2, scaled_width - output_width))
+        y = max(0.0, min(cursor_y * scaled_height - output_height / 2, scaled_height - output_height))
 
-        q_image = QImage(image_bytes, width, height, bytes_per_line, QImage.Format.Format_Grayscale8)
-        pixmap = QPixmap.fromImage(q_image)
+        source_x = min(int(x / scale), width - 1)
+        source_y = min(int(y / scale), height - 1)
+        source_width = max(1, min(width - source_x, round(output_width / scale)))
+        source_height = max(1, min(height - source_y, round(output_height / scale)))
+        return (source_x, source_y, source_width, source_height), (output_width, output_height)
 
+    def display_2d_image(self, label, view, level=0, oblique=None, slab=None):
+        """
+        Show a view's current slice. The pixmap is the base layer and the crosshair is drawn
+        over it by the label, so when nothing the pixmap depends on changed (a drag within
+        the slice) only the crosshair moves; the slice is not extracted, windowed or scaled.
+        """
         label_size = label.size()
-        scaled_size = pixmap.size()
-        scaled_size.scale(label_size * self.zoom_factor, Qt.AspectRatioMode.KeepAspectRatio)
-
-        scaled_pixmap = pixmap.scaled(scaled_size, Qt.AspectRatioMode.KeepAspectRatio,
-                                      Qt.TransformationMode.SmoothTransformation)
-
-        # Calculate the visible portion of the image based on zoom and cursor position
-        visible_width = label_size.width()
-        visible_height = label_size.height()
-
-        cursor_x, cursor_y = self.cursor_position[view].x(), self.cursor_position[view].y()
-
-        # Calculate the top-left corner of the visible portion
-        x = int((cursor_x * scaled_pixmap.width()) - (visible_width / 2))
-        y = int((cursor_y * scaled_pixmap.height()) - (visible_height / 2))
+        image_shape = self.slice_shape(view, level)
+        source_rect, output_size = self.visible_source_rect(view, image_shape, label_size, self.zoom_factor)
+        cache_key = self.slice_cache_key(view, self.current_slices[view], label_size, self.window_level.version,
+                                         source_rect, level, oblique, slab)
+        if cache_key == self.displayed_keys.get(view) and self.volume_complete:
+            self.perf.count("overlay_only")
+        else:
+            # Slices of a volume that is still loading may change, so they are not cached
+            visible_image = self.slice_cache.get(cache_key) if self.volume_complete else None
+            if visible_image is None:
+                self.perf.count("slice_cache_miss")
+                visible_image = self.render_2d_image(self.current_slice(view, level, oblique, slab), view,
+                                                     source_rect, output_size)
+                if self.volume_complete:
+                    self.slice_cache.put(cache_key, visible_image, visible_image.sizeInBytes())
+            else:
+                self.perf.count("slice_cache_hit")
+
+            with self.perf.stage("pixmap"):
+                label.setPixmap(QPixmap.fromImage(visible_image))
+            self.displayed_keys[view] = cache_key
+        self.visible_rects[view] = (source_rect, image_shape)
+
+        source_x, source_y, source_width, source_height = source_rect
+        output_width, output_height = output_size
+        x_offset = (label_size.width() - output_width) // 2
+        y_offset = (label_size.height() - output_height) // 2
+
+        height, width = image_shape
+
+        def to_label(x, y):
+            return QPointF((x * width - source_x) * output_width / source_width + x_offset,
+                           (y * height - source_y) * output_height / source_height + y_offset)
+
+        # Update crosshair position and the ROI outline; both are drawn over the pixmap
+        label.crosshair_position = to_label(self.cursor_position[view].x(), self.cursor_position[view].y())
+        label.roi_rect = self.roi_rect(view, to_label)
+        label.roi_text = f"{self.roi_stats['mean']:.1f} ± {self.roi_stats['std']:.1f}" \
+            if label.roi_rect is not None and self.roi_stats is not None else None
+        label.label_layer = self.label_layer(view, to_label)
+        label.update()
 
-        # Adjust x and y to keep the image within bounds
-        x = max(0, min(x, scaled_pixmap.width() - visible_width))
-        y = max(0, min(y, scaled_pixmap.height() - visible_height))
+    def render_2d_image(self, image, view, source_rect, output_size, snapshot=None):
+        """
+        Window, flip, crop and resample one slice. Only the visible source region is
+        windowed and scaled, so the cost follows the label size rather than the zoom.
+        """
+        image = display_flip(view, image)
 
-        # Crop the pixmap to the visible portion
-        cropped_pixmap = scaled_pixmap.copy(x, y, visible_width, visible_height)
+        x, y, width, height = source_rect
+        with self.perf.stage("window"):
+            windowed = self.apply_brightness_contrast(image[y:y + height, x:x + width], snapshot)
+        with self.perf.stage("qimage"):
+            q_image = numpy_to_qimage(windowed)
 
-        label.setPixmap(cropped_pixmap)
-        x_offset = (label_size.width() - scaled_pixmap.width()) // 2
-        y_offset = (label_size.height() - scaled_pixmap.height()) // 2
+        if (width, height) == output_size:
+            return q_image
+        with self.perf.stage("scale"):
+            return q_image.scaled(output_size[0], output_size[1], Qt.AspectRatioMode.IgnoreAspectRatio,
+                                  Qt.TransformationMode.SmoothTransformation)
 
-        # Update crosshair position
-        cursor_x, cursor_y = self.cursor_position[view].x(), self.cursor_position[view].y()
-        label.crosshair_position = QPointF(cursor_x * scaled_pixmap.width() + x_offset,
-                                           cursor_y * scaled_pixmap.height() + y_offset)
-        label.update()
+    def to_image_position(self, view, pos):
+        """
+        Convert a position normalized to the displayed (possibly zoomed and cropped)
+        pixmap into one normalized to the whole slice.
+        """
+        if view not in self.visible_rects:
+            return pos
+        (x, y, width, height), (image_height, image_width) = self.visible_rects[view]
+        return QPointF((x + pos.x() * width) / image_width, (y + pos.y() * height) / image_height)
 
-    def apply_brightness_contrast(self, image):
+    def prefetch_ahead(self, views, direction, wrap=False):
+        """
+        Queue background renders of the next slices in the scroll or playback direction.
+        Slices are ordered nearest-first across the given views.
         """
-        Adjust the brightness and contrast using gamma correction.
+        if self.image_data is None or not self.volume_complete:
+            return
+        snapshot = self.window_level.snapshot()
+        version = snapshot[0]
+        volume = self.image_data
+        jobs = []
+        for step in range(1, self.prefetcher.depth + 1):
+            for view in views:
+                slice_count = self.display_shape[{"axial": 0, "sagittal": 2, "coronal": 1}[view]]
+                index = self.current_slices[view] + step * direction
+                if wrap:
+                    index %= slice_count
+                elif not 0 <= index < slice_count:
+                    continue
+                label_size = getattr(self, f"{view}_view").size()
+                level = self.display_level(view, label_size)
+                source_rect, output_size = self.visible_source_rect(view, self.slice_shape(view, level), label_size,
+                                                                    self.zoom_factor)
+                oblique = self.oblique_state(view)
+                slab = self.slab_state(view)
+                key = self.slice_cache_key(view, index, label_size, version, source_rect, level, oblique, slab)
+                if key not in self.slice_cache:
+                    jobs.append((key, partial(self.prefetch_slice, key, volume, view, index, level, source_rect,
+                                              output_size, snapshot, oblique, self.orientation, slab)))
+        self.prefetcher.prefetch(jobs)
+
+    def prefetch_slice(self, key, volume, view, index, level, source_rect, output_size, snapshot, oblique,
+                       orientation, slab):
+        # Runs on a worker thread, so only the captured volume, window snapshot (table, dtype and
+        # value range together), oblique plane, orientation and slab are used
+        visible_image = self.render_2d_image(
+            self.extract_slice(view, index, volume, level, oblique, orientation, slab),
+            view, source_rect, output_size, snapshot)
+        self.slice_cache.put(key, visible_image, visible_image.sizeInBytes())
+
+    def apply_brightness_contrast(self, image, snapshot=None):
+        """
+        Adjust the brightness and contrast through the window/level lookup table.
         - Brightness is applied as a gamma adjustment.
         - Contrast is applied as a scaling factor.
+        The table is normalized to the whole volume's intensity range.
         """
-        if np.max(image) != 0:
-            image_normalized = image.astype(float) / np.max(image)
-        else:
-            image_normalized = image.astype(float)
-
-        # Gamma correction for brightness (invert brightness to align with perception)
-        gamma = 1 / self.brightness if self.brightness != 0 else 1
-        image_bright = np.power(image_normalized, gamma)
-
-        # Scaling for contrast adjustment
-        contrast_factor = self.contrast
-        image_contrasted = np.clip((image_bright - 0.5) * contrast_factor + 0.5, 0, 1)
-
-        return (image_contrasted * 255).astype(np.uint8)
+        return self.window_level.apply(image, snapshot)
 
     def update_brightness_contrast(self):
         self.brightness = self.brightness_slider.value() / 100.0
         self.contrast = self.contrast_slider.value() / 100.0
-        self.update_2d_views()
-
-    def create_3d_view(self):
-        if self.image_data is not None:
-            dataImporter = vtk.vtkImageImport()
-            data_string = self.image_data.astype(np.uint8).tobytes()
-            dataImporter.CopyImportVoidPointer(data_string, len(data_string))
-            dataImporter.SetDataScalarTypeToUnsignedChar()
-            dataImporter.SetNumberOfScalarComponents(1)
-            dataImporter.SetDataExtent(0, self.image_data.shape[2] - 1, 0, self.image_data.shape[1] - 1, 0,
-                                       self.image_data.shape[0] - 1)
-            dataImporter.SetWholeExtent(0, self.image_data.shape[2] - 1, 0, self.image_data.shape[1] - 1, 0,
-                                        self.image_data.shape[0] - 1)
-
-            volumeMapper = vtk.vtkGPUVolumeRayCastMapper()
-            volumeMapper.SetInputConnection(dataImporter.GetOutputPort())
-
-            volumeProperty = vtk.vtkVolumeProperty()
-            volumeProperty.ShadeOn()
-            volumeProperty.SetInterpolationTypeToLinear()
-
-            compositeOpacity = vtk.vtkPiecewiseFunction()
-            compositeOpacity.AddPoint(0.0, 0.0)
-            compositeOpacity.AddPoint(80.0, 0.1)
-            compositeOpacity.AddPoint(255.0, 0.2)
-            volumeProperty.SetScalarOpacity(compositeOpacity)
-
-            color = vtk.vtkColorTransferFunction()
-            color.AddRGBPoint(0.0, 0.0, 0.0, 0.0)
-            color.AddRGBPoint(64.0, 1.0, 0.0, 0.0)
-            color.AddRGBPoint(128.0, 0.0, 0.0, 1.0)
-            color.AddRGBPoint(192.0, 0.0, 1.0, 0.0)
-            color.AddRGBPoint(255.0, 1.0, 1.0, 1.0)
-            volumeProperty.SetColor(color)
+        if self.window_level.set_params(self.brightness, self.contrast):
+            self.update_2d_views()
 
-            volume = vtk.vtkVolume()
-            volume.SetMapper(volumeMapper)
-            volume.SetProperty(volumeProperty)
+    def on_3d_frame(self):
+        self.perf.record("render_3d", self.volume_3d.frame_times[-1])
+        self.update_3d_title()
 
-            self.renderer.RemoveAllViewProps()
-            self.renderer.AddVolume(volume)
-            self.renderer.ResetCamera()
+    def update_3d_title(self):
+        if self.view_3d_mode == "planes":
+            mode = "MPR planes"
+        elif self.volume_3d.active_backend is not None:
+            mode = self.volume_3d.active_backend.upper()
+        else:
+            return
+        self.view_3d_title.setText(f"3D View ({mode}, {self.volume_3d.frame_time() * 1000:.0f} ms)")
 
-            self.view_3d.GetRenderWindow().Render()
+    def create_3d_view(self, reset_camera=True):
+        if self.image_data is None:
+            return
+        if self.view_3d_mode == "planes":
+            # Only the three current slices are sent to VTK, by update_single_view. They are
+            # placed in displayed coordinates, so they already follow the orientation.
+            if (self.slice_planes.set_volume(self.display_shape, self.orientation.spacing(self.voxel_spacing))
+                    or reset_camera):
+                self.renderer.ResetCamera(*self.slice_planes.outline.GetBounds())
+            self.update_2d_views()
+        else:
+            # The stored volume is uploaded once; the orientation only changes the actor's matrix
+            self.volume_3d.set_orientation(self.orientation.matrix(self.image_data.shape, self.voxel_spacing))
+            self.volume_3d.set_volume(self.image_data, self.window_level.stored_window(), self.voxel_spacing,
+                                      reset_camera)
 
+    def set_3d_mode(self, mode):
+        """
+        Switch the 3D view between full volume rendering and the three textured MPR planes.
+        The hidden mode keeps its scene objects, so switching back does not rebuild them.
+        """
+        self.view_3d_mode = mode
+        self.volume_3d.set_visible(mode == "volume")
+        self.slice_planes.set_visible(mode == "planes")
+        if self.image_data is not None and self.volume_complete:
+            self.create_3d_view(reset_camera=False)
 
+    def render_3d_planes(self, views):
+        # One 3D render per scheduler flush, after the planes of all repainted views moved
+        if self.view_3d_mode == "planes" and self.slice_planes.shape is not None:
+            self.volume_3d.render()
 
     def handle_view_click(self, label, pos):
         if self.image_data is None:
             return
 
         view_name = self.get_view_name(label)
-        x, y = pos.x(), pos.y()
 
-        if self.pointer_mode:
-            self.update_cursor_position(view_name, x, y)
+        if self.pointer_mode and self.roi_mode:
+            self.pending_drag = None
+            if self.oblique_state(view_name) is None:
+                self.roi_anchor = (view_name, self.roi_voxel(view_name, pos))
+                self.update_roi(view_name, pos)
+        elif self.pointer_mode:
+            self.pending_drag = None
+            image_pos = self.to_image_position(view_name, pos)
+            self.update_cursor_position(view_name, image_pos.x(), image_pos.y())
         else:
             self.last_mouse_pos = pos
             self.is_dragging = True
@@ -576,8 +1486,11 @@ class EnhancedMultiViewMedicalImageViewer(QMainWindow):
 
         if self.pointer_mode:
             if QApplication.mouseButtons() == Qt.MouseButton.LeftButton:
-                x, y = pos.x(), pos.y()
-                self.update_cursor_position(view_name, x, y)
+                # Moves are coalesced to one per display frame; only the latest position is used
+                self.pending_drag = (view_name, pos)
+                if not self.drag_timer.isActive():
+                    wait = self.render_scheduler.min_interval - (time.perf_counter() - self.last_drag)
+                    self.drag_timer.start(max(0, int(wait * 1000)))
         elif self.is_dragging:
             if self.last_mouse_pos is not None:
                 dx = pos.x() - self.last_mouse_pos.x()
@@ -587,6 +1500,17 @@ class EnhancedMultiViewMedicalImageViewer(QMainWindow):
             self.last_mouse_pos = pos
 
 
+    def apply_pending_drag(self):
+        if self.pending_drag is None or self.image_data is None:
+            return
+        (view_name, pos), self.pending_drag = self.pending_drag, None
+        self.last_drag = time.perf_counter()
+        if self.roi_mode:
+            self.update_roi(view_name, pos)
+            return
+        image_pos = self.to_image_position(view_name, pos)
+        self.update_cursor_position(view_name, image_pos.x(), image_pos.y())
+
     def toggle_pointer_hand_mode(self, checked):
         self.pointer_mode = not checked
         self.pointer_hand_button.setText("Hand Mode" if checked else "Pointer Mode")
@@ -600,8 +1524,91 @@ class EnhancedMultiViewMedicalImageViewer(QMainWindow):
     def mouseReleaseEvent(self, event):
         self.is_dragging = False
 
+    def closeEvent(self, event):
+        self.cancel_loading()
+        self.cine_timer.stop()
+        self.perf_timer.stop()
+        self.prefetcher.shutdown()
+        self.frame_prefetcher.shutdown()
+        super().closeEvent(event)
+
 
 
+    def create_performance_controls(self):
+        self.perf_checkbox = QCheckBox("Performance Overlay")
+        self.perf_checkbox.setChecked(self.performance_overlay)
+        self.perf_checkbox.toggled.connect(self.toggle_performance_overlay)
+        self.side_layout.addWidget(self.perf_checkbox)
+        self.perf_save_button = QPushButton("Save Performance Trace")
+        self.perf_save_button.clicked.connect(self.save_performance_trace)
+        self.side_layout.addWidget(self.perf_save_button)
+
+        # The overlay text is refreshed on a timer rather than formatted on every frame
+        self.perf_timer = QTimer()
+        self.perf_timer.timeout.connect(self.refresh_performance_overlay)
+        if self.performance_overlay:
+            self.perf_timer.start(500)
+
+    def toggle_performance_overlay(self, checked):
+        """
+        Show FPS and p50/p95 frame times on each 2D view. Timings are collected only while
+        the overlay is on; turning it on starts a fresh set of samples.
+        """
+        self.perf.set_enabled(checked)
+        if checked:
+            self.perf_timer.start(500)
+        else:
+            self.perf_timer.stop()
+            logging.debug("Performance: %s", self.perf.stats())
+        self.refresh_performance_overlay()
+
+    def refresh_performance_overlay(self):
+        for view in ["axial", "sagittal", "coronal"]:
+            label = getattr(self, f"{view}_view")
+            label.overlay_text = None
+            if self.perf.enabled:
+                stats = self.perf.stage_stats(f"frame.{view}")
+                label.overlay_text = (f"{stats['per_second']} fps  p50 {stats['p50_ms']:.1f} ms  "
+                                      f"p95 {stats['p95_ms']:.1f} ms" if stats else "0 fps")
+            label.update()
+
+    def performance_trace(self):
+        """
+        Stage timings plus the state needed to read them, for attaching to bug reports.
+        """
+        trace = {"slice_cache": self.slice_cache.stats(), "oblique": self.oblique.stats(), "slab": self.slab.stats(),
+                 "volume_stats": self.volume_stats.stats(), "roi_index": self.integral.stats(),
+                 "labels": self.label_overlay.stats(),
+                 "volume_cache": self.volume_cache.stats() if self.volume_cache is not None else None,
+                 "3d": {"mode": self.view_3d_mode, "backend": self.volume_3d.active_backend,
+                        "frame_ms": self.volume_3d.frame_time() * 1000}}
+        if self.image_data is not None:
+            trace["volume"] = {"shape": self.image_data.shape, "dtype": str(self.image_data.dtype),
+                               "spacing": self.voxel_spacing, "complete": self.volume_complete}
+            trace["frames"] = {"count": self.frame_count, "index": self.frame_index,
+                               "cache": self.frame_cache.stats()}
+            trace["view"] = {"zoom": self.zoom_factor, "slices": dict(self.current_slices),
+                             "oblique_angles": self.oblique_angles, "orientation": self.orientation.key(),
+                             "slab": (self.slab_mode, self.slab_thickness),
+                             "sizes": {view: (getattr(self, f"{view}_view").width(),
+                                              getattr(self, f"{view}_view").height())
+                                       for view in ["axial", "sagittal", "coronal"]}}
+        if self.cine_frames:
+            trace["cine"] = self.cine_stats()
+        return trace
+
+    def save_performance_trace(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save Performance Trace", "mpr_performance.json",
+                                                   "JSON Files (*.json)")
+        if not file_path:
+            return
+        try:
+            self.perf.dump(file_path, self.performance_trace())
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Could not save the performance trace: {e}")
+            return
+        self.statusBar().showMessage(f"Performance trace saved to {file_path}", 5000)
+
     def create_cine_controls(self):
         cine_layout = QHBoxLayout()
         self.play_button = QPushButton("Play")
@@ -612,40 +1619,192 @@ class EnhancedMultiViewMedicalImageViewer(QMainWindow):
         cine_layout.addWidget(self.stop_button)
         self.side_layout.addLayout(cine_layout)
 
+        self.cine_fps_spin = QSpinBox()
+        self.cine_fps_spin.setRange(1, 60)
+        self.cine_fps_spin.setValue(10)
+        self.cine_fps_spin.setSuffix(" fps")
+        self.cine_fps_spin.valueChanged.connect(self.set_cine_fps)
+        self.side_layout.addWidget(QLabel("Cine Speed:"))
+        self.side_layout.addWidget(self.cine_fps_spin)
+
+        self.cine_mode_combo = QComboBox()
+        self.cine_mode_combo.addItems(["Slices", "Time"])
+        self.cine_mode_combo.setEnabled(False)
+        self.side_layout.addWidget(self.cine_mode_combo)
+
+        self.time_label = QLabel("Time Frame:")
+        self.time_slider = QSlider(Qt.Orientation.Horizontal)
+        self.time_slider.setEnabled(False)
+        self.time_slider.valueChanged.connect(self.set_frame)
+        self.side_layout.addWidget(self.time_label)
+        self.side_layout.addWidget(self.time_slider)
+
         self.play_button.clicked.connect(self.start_cine)
         self.pause_button.clicked.connect(self.pause_cine)
         self.stop_button.clicked.connect(self.stop_cine)
 
         self.cine_timer = QTimer()
+        self.cine_timer.setTimerType(Qt.TimerType.PreciseTimer)
         self.cine_timer.timeout.connect(self.cine_scroll)
+        self.cine_frames = 0
+        self.cine_dropped = 0
+        self.cine_started = 0.0
+        self.cine_last_tick = None
+        self.cine_last_report = 0.0
+
+    def update_time_slider(self):
+        series = self.frame_count > 1
+        self.time_slider.blockSignals(True)
+        self.time_slider.setRange(0, self.frame_count - 1)
+        self.time_slider.setValue(self.frame_index)
+        self.time_slider.blockSignals(False)
+        self.time_slider.setEnabled(series)
+        self.cine_mode_combo.setEnabled(series)
+        if not series:
+            self.cine_mode_combo.setCurrentText("Slices")
+        self.time_label.setText(f"Time Frame: {self.frame_index + 1} / {self.frame_count}" if series else "Time Frame:")
+
+    def set_frame(self, index):
+        """
+        Show one time frame of a 4D series. The frame replaces the displayed volume but keeps
+        the series' window, orientation, slices and crosshair. Frames come from the frame
+        cache, or are mapped from the file and read into the cache in the background.
+        Returns False while the frame is not on disk yet (a .nii.gz still decompressing).
+        """
+        if self.frame_count <= 1 or not self.volume_complete or not 0 <= index < self.frame_count:
+            return False
+        if not self.volume_source.frame_ready(index):
+            return False
+        frame = self.frame_cache.get(index)
+        if frame is None:
+            frame = self.volume_source.frame(index)
+        self.frame_index = index
+        # Bypass the image_data setter: it resets the state of a newly loaded volume
+        self._image_data = frame
+        self.update_time_slider()
+        self.prefetch_frames(index)
+        self.update_2d_views()
+        if not self.cine_timer.isActive():
+            self.update_3d_frame()
+            self.update_roi_stats()
+        return True
+
+    def update_3d_frame(self):
+        # Planes follow the frame through update_single_view; the volume is uploaded again
+        if self.view_3d_mode == "volume" and self.volume_3d.array is not None:
+            self.create_3d_view(reset_camera=False)
+
+    def load_frame(self, source, index):
+        # Runs on the frame prefetch thread. A copy, so the frame is read from disk here
+        # rather than when playback reaches it
+        frame = np.array(source.frame(index), copy=True)
+        self.frame_cache.put(index, frame, frame.nbytes)
+
+    def prefetch_frames(self, index):
+        """
+        Read the frames after index into the frame cache, wrapping around for playback.
+        """
+        jobs = []
+        for step in range(self.frame_prefetcher.depth + 1):
+            frame_index = (index + step) % self.frame_count
+            if frame_index not in self.frame_cache:
+                jobs.append((frame_index, partial(self.load_frame, self.volume_source, frame_index)))
+        self.frame_prefetcher.prefetch(jobs)
+
+    def cine_interval(self):
+        return 1.0 / self.cine_fps_spin.value()
+
+    def set_cine_fps(self, fps):
+        if self.cine_timer.isActive():
+            self.cine_timer.setInterval(round(1000 / fps))
+            self.cine_frames = 0
+            self.cine_dropped = 0
+            self.cine_started = time.perf_counter()
+            self.cine_last_tick = None
 
     def start_cine(self):
         if self.image_data is not None:
-            self.cine_timer.start(100)  # Adjust speed as needed (100 ms interval)
+            self.cine_frames = 0
+            self.cine_dropped = 0
+            self.cine_started = time.perf_counter()
+            self.cine_last_tick = None
+            if self.temporal_cine():
+                self.prefetch_frames(self.frame_index)
+            else:
+                self.prefetch_ahead(["axial", "sagittal", "coronal"], 1, wrap=True)
+            self.cine_timer.start(round(1000 * self.cine_interval()))
+
+    def temporal_cine(self):
+        return self.frame_count > 1 and self.cine_mode_combo.currentText() == "Time"
 
     def pause_cine(self):
+        was_playing = self.cine_timer.isActive()
         self.cine_timer.stop()
+        self.prefetcher.cancel()
+        self.report_cine_stats()
+        if was_playing and self.temporal_cine():
+            self.update_3d_frame()
+            self.update_roi_stats()
 
     def stop_cine(self):
-        self.cine_timer.stop()
-        self.reset_slice_positions()
+        self.pause_cine()
+        if self.temporal_cine():
+            self.set_frame(0)
+        else:
+            self.reset_slice_positions()
 
     def cine_scroll(self):
         if self.image_data is not None:
-            for view in ["axial", "sagittal", "coronal"]:
-                current_slice = self.current_slices[view]
-                max_slice = self.image_data.shape[{"axial": 0, "sagittal": 2, "coronal": 1}[view]] - 1
-                next_slice = (current_slice + 1) % (max_slice + 1)
-                self.update_slice(view, next_slice)
-            self.update_2d_views()
+            now = time.perf_counter()
+            if self.cine_last_tick is not None:
+                # Every whole interval that passed without a tick is a frame we never showed
+                missed = int((now - self.cine_last_tick) / self.cine_interval()) - 1
+                self.cine_dropped += max(0, missed)
+            self.cine_last_tick = now
+
+            if self.temporal_cine():
+                # A frame that is not decompressed yet is held, and counted as dropped
+                if self.set_frame((self.frame_index + 1) % self.frame_count):
+                    self.cine_frames += 1
+                else:
+                    self.cine_dropped += 1
+            else:
+                self.cine_frames += 1
+                for view in ["axial", "sagittal", "coronal"]:
+                    current_slice = self.current_slices[view]
+                    max_slice = self.display_shape[{"axial": 0, "sagittal": 2, "coronal": 1}[view]] - 1
+                    next_slice = (current_slice + 1) % (max_slice + 1)
+                    self.update_slice(view, next_slice)
+                self.prefetch_ahead(["axial", "sagittal", "coronal"], 1, wrap=True)
+
+            if now - self.cine_last_report >= 1.0:
+                self.cine_last_report = now
+                self.report_cine_stats()
+
+    def cine_stats(self):
+        elapsed = time.perf_counter() - self.cine_started
+        return {
+            "frames": self.cine_frames,
+            "dropped": self.cine_dropped,
+            "target_fps": self.cine_fps_spin.value(),
+            "fps": self.cine_frames / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def report_cine_stats(self):
+        if not self.cine_frames:
+            return
+        stats = self.cine_stats()
+        message = (f"Cine: {stats['fps']:.1f} / {stats['target_fps']} fps, "
+                   f"{stats['dropped']} dropped frames")
+        self.statusBar().showMessage(message)
+        logging.debug("%s, slice cache %s", message, self.slice_cache.stats())
 
     def reset_slice_positions(self):
         if self.image_data is not None:
             for view in ["axial", "sagittal", "coronal"]:
-                max_slice = self.image_data.shape[{"axial": 0, "sagittal": 2, "coronal": 1}[view]] - 1
+                max_slice = self.display_shape[{"axial": 0, "sagittal": 2, "coronal": 1}[view]] - 1
                 middle_slice = max_slice // 2
                 self.update_slice(view, middle_slice)
-            self.update_2d_views()
 
     def wheelEvent(self, event):
         if self.image_data is None:
@@ -658,15 +1817,11 @@ class EnhancedMultiViewMedicalImageViewer(QMainWindow):
             # Slice scrolling behavior for pointer mode
             slice_change = 1 if delta > 0 else -1
             current_slice = self.current_slices[focused_view]
-            max_slice = self.image_data.shape[{"axial": 0, "sagittal": 2, "coronal": 1}[focused_view]] - 1
+            max_slice = self.display_shape[{"axial": 0, "sagittal": 2, "coronal": 1}[focused_view]] - 1
             new_slice = max(0, min(current_slice + slice_change, max_slice))
-            self.current_slices[focused_view] = new_slice
-
-            # Update the corresponding slider
-            if focused_view in self.slice_sliders:
-                self.slice_sliders[focused_view].setValue(new_slice)
-
+            self.update_slice(focused_view, new_slice)
             self.update_2d_views()
+            self.prefetch_ahead([focused_view], slice_change)
         else:
             # Zoom behavior for hand mode
             zoom_speed = 0.1  # Adjust this value to control zoom sensitivity
@@ -704,6 +1859,10 @@ class EnhancedMultiViewMedicalImageViewer(QMainWindow):
 
     def reset_all(self):
         self.reset_view()
+        for slider in self.oblique_sliders:
+            slider.setValue(0)
+        self.slab_combo.setCurrentText("Off")
+        self.window_preset_combo.setCurrentIndex(self.window_preset_combo.findData(type(self).window_preset))
         self.reset_slice_positions()
         self.brightness_slider.setValue(100)
         self.contrast_slider.setValue(100)
@@ -712,12 +1871,27 @@ class EnhancedMultiViewMedicalImageViewer(QMainWindow):
         self.update_2d_views()
 
     def rotate_view(self, view):
-        if self.image_data is not None:
+        """
+        Turn the displayed volume a quarter turn in the axial plane. Only the orientation
+        changes; the crosshair stays on the same voxel.
+        """
+        if self.image_data is not None and self.volume_complete:
             if view == "axial":
-                self.image_data = np.rot90(self.image_data, axes=(1, 2))
+                self.set_orientation(self.orientation.rotated())
             self.update_slice_sliders()
             self.update_2d_views()
 
+    def set_orientation(self, orientation):
+        point = (self.current_slices["axial"], self.current_slices["coronal"], self.current_slices["sagittal"])
+        point = self.orientation.to_source(point, self.image_data.shape)
+        self.orientation = orientation
+        self.set_cursor_voxel(*self.orientation.from_source(point, self.image_data.shape))
+        if self.view_3d_mode == "planes":
+            self.create_3d_view(reset_camera=False)
+        else:
+            self.volume_3d.set_orientation(self.orientation.matrix(self.image_data.shape, self.voxel_spacing))
+            self.volume_3d.render()
+
 
     def get_focused_view(self):
         for view, label in [("axial", self.axial_view), ("sagittal", self.sagittal_view),
@@ -0,0 +1,252 @@
+"""
+Headless export of slices, montages and projections from many studies.
+
+Usage:
+    python batch_export.py STUDY [STUDY ...] --output DIR [--slice axial:40] [--montage axial] [--mip coronal]
+
+Each STUDY is a DICOM folder or a NIfTI file. Studies are loaded as the viewer loads them
+(the first frame of a time series) and windowed, flipped and quantized exactly as the viewer
+displays them, at the native slice resolution. NIfTI files are read into memory, so nothing
+is left on disk besides the exports. Studies run in parallel across a process pool.
+"""
+import os
+import sys
+import math
+import time
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import nibabel as nib
+from nibabel.openers import ImageOpener
+
+from windowing import WindowLevelLUT
+from volume_stats import VolumeStatistics
+from orientation import display_flip
+from image_io import save_png
+from dicom_loader import load_dicom_volume
+from nifti_backend import sample_range
+
+VIEW_AXIS = {"axial": 0, "sagittal": 2, "coronal": 1}
+
+
+def study_name(path):
+    name = os.path.basename(os.path.normpath(path))
+    for extension in (".nii.gz", ".nii"):
+        if name.endswith(extension):
+            return name[:-len(extension)]
+    return name
+
+
+def read_nifti(path):
+    """
+    The first frame of a NIfTI file in its stored dtype, read into memory as the viewer maps it.
+    - Nothing is decompressed to disk, and only the first frame of a time series is read.
+    - slope and intercept are the header scaling, left to the display lookup table.
+    """
+    image = nib.load(path)
+    proxy = image.dataobj
+    dtype = image.header.get_data_dtype()
+    shape = tuple(proxy.shape[:3])
+    size = int(np.prod(shape)) * dtype.itemsize
+    with ImageOpener(path, "rb") as file:
+        file.seek(int(proxy.offset))
+        data = file.read(size)
+    if len(data) < size:
+        raise ValueError(f"{path} is truncated")
+    volume = np.frombuffer(data, dtype=dtype).reshape(shape, order="F").T
+    return {"volume": volume, "value_range": sample_range(volume),
+            "slope": float(proxy.slope), "intercept": float(proxy.inter)}
+
+
+def load_study(path, workers=None):
+    """
+    Volume, stored value range and rescale of a DICOM folder or NIfTI file, as the viewer loads them.
+    """
+    if os.path.isdir(path):
+        volume = load_dicom_volume(path, workers)
+        return {"volume": volume, "value_range": (float(volume.min()), float(volume.max())),
+                "slope": 1.0, "intercept": 0.0}
+    result = read_nifti(path)
+    volume = result["volume"]
+    # Same padding the viewer applies to NIfTI files with fewer than three dimensions
+    while volume.ndim < 3:
+        volume = np.expand_dims(volume, axis=-1)
+    result["volume"] = volume
+    return result
+
+
+def render(view, image, window_level):
+    """
+    The viewer's display pipeline for one slice or projection: flip, then window/level.
+    """
+    return window_level.apply(display_flip(view, image))
+
+
+def slice_index(volume, view, index):
+    count = volume.shape[VIEW_AXIS[view]]
+    # The viewer opens every view on its middle slice
+    index = (count - 1) // 2 if index is None else index
+    return min(max(index, 0), count - 1)
+
+
+def take_slice(volume, view, index):
+    return np.take(volume, index, axis=VIEW_AXIS[view])
+
+
+def montage(volume, view, window_level, step=1, columns=None):
+    """
+    Every step-th slice of a view tiled row by row, first slice at the top left.
+    """
+    indices = range(0, volume.shape[VIEW_AXIS[view]], max(1, step))
+    tiles = [render(view, take_slice(volume, view, index), window_level) for index in indices]
+    columns = columns or math.ceil(math.sqrt(len(tiles)))
+    rows = math.ceil(len(tiles) / columns)
+    height, width = tiles[0].shape
+    sheet = np.zeros((rows * height, columns * width), dtype=np.uint8)
+    for number, tile in enumerate(tiles):
+        row, column = divmod(number, columns)
+        sheet[row * height:(row + 1) * height, column * width:(column + 1) * width] = tile
+    return sheet
+
+
+def export_study(path, output_dir, slices=(), montages=(), mips=(), brightness=1.0, contrast=1.0,
+                 montage_step=1, montage_columns=None, workers=None):
+    """
+    Export one study into output_dir. Runs in a worker process, so it only takes picklable
+    arguments and returns a small summary.
+    """
+    start = time.perf_counter()
+    study = load_study(path, workers)
+    volume = study["volume"]
+    loaded = time.perf_counter()
+
+    # The viewer windows to the histogram's exact range once it is ready; the loader's may be an estimate
+    statistics = VolumeStatistics()
+    statistics.set_volume(volume, study["value_range"], background=False)
+    window_level = WindowLevelLUT()
+    window_level.set_volume(volume, statistics.value_range, study.get("slope", 1.0), study.get("intercept", 0.0))
+    window_level.set_params(brightness, contrast)
+
+    written = []
+    for view, index in slices:
+        index = slice_index(volume, view, index)
+        file_path = os.path.join(output_dir, f"{view}_{index:04d}.png")
+        save_png(render(view, take_slice(volume, view, index), window_level), file_path)
+        written.append(file_path)
+    for view in montages:
+        file_path = os.path.join(output_dir, f"montage_{view}.png")
+        save_png(montage(volume, view, window_level, montage_step, montage_columns), file_path)
+        written.append(file_path)
+    for view in mips:
+        file_path = os.path.join(output_dir, f"mip_{view}.png")
+        save_png(render(view, np.max(volume, axis=VIEW_AXIS[view]), window_level), file_path)
+        written.append(file_path)
+
+    return {"path": path, "shape": volume.shape, "bytes": volume.nbytes, "images": written,
+            "load_seconds": loaded - start, "seconds": time.perf_counter() - start}
+
+
+def parse_slice(spec):
+    view, _, index = spec.partition(":")
+    if view not in VIEW_AXIS:
+        raise argparse.ArgumentTypeError(f"unknown view {view!r}; expected axial, sagittal or coronal")
+    try:
+        return view, int(index) if index else None
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"slice index must be an integer: {spec!r}")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Export slices, montages and MIPs from DICOM folders and "
+                                                 "NIfTI files without starting the viewer.")
+    parser.add_argument("studies", nargs="*", help="DICOM folders or NIfTI files")
+    parser.add_argument("--list", dest="study_list", help="text file with one study path per line")
+    parser.add_argument("--output", "-o", required=True, help="output directory; one sub-folder per study")
+    parser.add_argument("--slice", dest="slices", action="append", type=parse_slice, default=[],
+                        metavar="VIEW[:INDEX]", help="export one slice (default index: the middle slice)")
+    parser.add_argument("--montage", dest="montages", action="append", choices=list(VIEW_AXIS), default=[],
+                        help="export all slices of a view as one tiled image")
+    parser.add_argument("--montage-step", type=int, default=1, help="use every N-th slice in montages")
+    parser.add_argument("--montage-columns", type=int, help="tiles per montage row (default: square)")
+    parser.add_argument("--mip", dest="mips", action="append", choices=list(VIEW_AXIS), default=[],
+                        help="export the maximum intensity projection along a view's axis")
+    parser.add_argument("--brightness", type=float, default=1.0, help="as the viewer's slider / 100 (default 1.0)")
+    parser.add_argument("--contrast", type=float, default=1.0, help="as the viewer's slider / 100 (default 1.0)")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                        help="studies processed in parallel (default: one per CPU)")
+    parser.add_argument("--threads", type=int, help="DICOM decoding threads per study (default: CPUs / jobs)")
+    parser.add_argument("--verbose", "-v", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.study_list:
+        with open(args.study_list) as study_list:
+            args.studies += [line.strip() for line in study_list if line.strip()]
+    if not args.studies:
+        parser.error("no studies given")
+    if not (args.slices or args.montages or args.mips):
+        args.slices = [(view, None) for view in VIEW_AXIS]
+    return args
+
+
+def output_dirs(output, studies):
+    # Studies with the same name get their position in the list appended
+    names = [study_name(path) for path in studies]
+    return [os.path.join(output, name if names.count(name) == 1 else f"{name}_{number}")
+            for number, name in enumerate(names)]
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+    jobs = max(1, min(args.jobs, len(args.studies)))
+    threads = args.threads or max(1, (os.cpu_count() or 1) // jobs)
+    options = {"slices": args.slices, "montages": args.montages, "mips": args.mips,
+               "brightness": args.brightness, "contrast": args.contrast, "montage_step": args.montage_step,
+               "montage_columns": args.montage_columns, "workers": threads}
+
+    start = time.perf_counter()
+    results, failures = [], []
+
+    def report(path, result=None, error=None):
+        if error is not None:
+            failures.append(path)
+            print(f"FAILED {path}: {error}", file=sys.stderr)
+            return
+        results.append(result)
+        print(f"{path}: {len(result['images'])} images, {result['shape']} in {result['seconds']:.2f} s "
+              f"(load {result['load_seconds']:.2f} s)")
+
+    tasks = list(zip(args.studies, output_dirs(args.output, args.studies)))
+    if jobs == 1:
+        for path, output_dir in tasks:
+            try:
+                result = export_study(path, output_dir, **options)
+            except Exception as e:
+                report(path, error=e)
+            else:
+                report(path, result)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {executor.submit(export_study, path, output_dir, **options): path
+                       for path, output_dir in tasks}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    report(futures[future], error=e)
+                else:
+                    report(futures[future], result)
+
+    elapsed = time.perf_counter() - start
+    images = sum(len(result["images"]) for result in results)
+    megabytes = sum(result["bytes"] for result in results) / 1024 ** 2
+    print(f"{len(results)} studies, {images} images in {elapsed:.2f} s with {jobs} processes: "
+          f"{len(results) / elapsed:.2f} studies/s, {images / elapsed:.1f} images/s, {megabytes / elapsed:.1f} MB/s"
+          + (f"; {len(failures)} failed" if failures else ""))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,367 @@
+"""
+Offscreen benchmarks for loading, slice extraction, windowing, redraw and 3D setup.
+
+Usage:
+    python benchmark.py [--sizes small medium] [--output results.json]
+    python benchmark.py --compare baseline.json results.json
+
+Synthetic DICOM series and NIfTI volumes are written to a temporary folder, loaded through
+the viewer and timed on its real code paths. Results are saved as JSON with the commit and
+library versions, so runs from different commits can be compared.
+"""
+import os
+import sys
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import json
+import time
+import shutil
+import logging
+import platform
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+import nibabel as nib
+import pydicom
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.uid import ExplicitVRLittleEndian, CTImageStorage, generate_uid
+import vtk
+from PyQt6.QtCore import PYQT_VERSION_STR, QT_VERSION_STR
+from PyQt6.QtWidgets import QApplication
+
+import MPR
+
+# (slices, rows, columns)
+SIZES = {"small": (64, 128, 128), "medium": (128, 256, 256), "large": (256, 512, 512)}
+NIFTI_DTYPES = ("int16", "uint16", "float32")
+ZOOM_FACTORS = (1.0, 2.0, 4.0)
+VIEW_AXIS = {"axial": 0, "sagittal": 2, "coronal": 1}
+VIEWS = tuple(VIEW_AXIS)
+
+
+def synthetic_volume(shape, dtype, seed=0):
+    """
+    Smooth blobs plus noise, so windowing and rendering see realistic value spreads.
+    """
+    rng = np.random.default_rng(seed)
+    z, y, x = np.ogrid[:shape[0], :shape[1], :shape[2]]
+    volume = np.zeros(shape, dtype=np.float32)
+    for _ in range(6):
+        centre = rng.uniform(0.2, 0.8, 3) * shape
+        radius = rng.uniform(0.1, 0.3) * min(shape)
+        distance = ((z - centre[0]) ** 2 + (y - centre[1]) ** 2 + (x - centre[2]) ** 2) / radius ** 2
+        volume += rng.uniform(200, 1500) * np.exp(-distance)
+    volume += rng.normal(0, 40, shape).astype(np.float32)
+    if np.dtype(dtype).kind == "u":
+        volume = np.clip(volume, 0, None)
+    return volume.astype(dtype)
+
+
+def write_dicom_series(folder, volume, spacing=(2.5, 0.7, 0.7)):
+    os.makedirs(folder, exist_ok=True)
+    series_uid = generate_uid()
+    for index, pixels in enumerate(volume):
+        meta = FileMetaDataset()
+        meta.MediaStorageSOPClassUID = CTImageStorage
+        meta.MediaStorageSOPInstanceUID = generate_uid()
+        meta.TransferSyntaxUID = ExplicitVRLittleEndian
+        dataset = Dataset()
+        dataset.file_meta = meta
+        dataset.SOPClassUID = CTImageStorage
+        dataset.SOPInstanceUID = meta.MediaStorageSOPInstanceUID
+        dataset.SeriesInstanceUID = series_uid
+        dataset.SeriesDescription = "Benchmark"
+        dataset.Rows, dataset.Columns = pixels.shape
+        dataset.BitsAllocated = dataset.BitsStored = 16
+        dataset.HighBit = 15
+        dataset.PixelRepresentation = 1 if pixels.dtype.kind == "i" else 0
+        dataset.SamplesPerPixel = 1
+        dataset.PhotometricInterpretation = "MONOCHROME2"
+        dataset.ImagePositionPatient = [0.0, 0.0, index * spacing[0]]
+        dataset.ImageOrientationPatient = [1, 0, 0, 0, 1, 0]
+        dataset.InstanceNumber = index + 1
+        dataset.PixelSpacing = [spacing[1], spacing[2]]
+        dataset.RescaleSlope = 1
+        dataset.RescaleIntercept = 0
+        dataset.PixelData = np.ascontiguousarray(pixels).tobytes()
+        dataset.save_as(os.path.join(folder, f"slice{index:04d}.dcm"), enforce_file_format=True)
+
+
+def write_nifti(file_path, volume, spacing=(2.5, 0.7, 0.7)):
+    # NIfTI stores (x, y, z); the viewer maps it back to (z, y, x)
+    image = nib.Nifti1Image(np.asfortranarray(volume.T), np.diag([spacing[2], spacing[1], spacing[0], 1.0]))
+    nib.save(image, file_path)
+
+
+def summarize(samples):
+    samples = np.asarray(samples) * 1000
+    return {"n": len(samples), "mean_ms": float(samples.mean()), "median_ms": float(np.median(samples)),
+            "p95_ms": float(np.percentile(samples, 95)), "min_ms": float(samples.min())}
+
+
+def timed(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+class BenchmarkViewer(MPR.EnhancedMultiViewMedicalImageViewer):
+    # Loads are timed cold, and synthetic studies are not left in the user's volume cache
+    volume_cache_limit_mb = 0
+
+
+class ViewerBenchmark:
+    """
+    Drives one offscreen viewer window through the timed code paths.
+    - Decompressed .nii.gz files go to a temporary folder that close() removes.
+    """
+
+    def __init__(self, app, repeat=20, cine_frames=120):
+        self.app = app
+        self.repeat = repeat
+        self.cine_frames = cine_frames
+        self.cache_dir = tempfile.mkdtemp(prefix="mpr_benchmark_cache_")
+        self.viewer = BenchmarkViewer()
+        self.viewer.nifti_cache_dir = self.cache_dir
+        self.viewer.resize(1200, 800)
+        self.viewer.show()
+        self.load_error = None
+        # Report loading errors instead of opening a modal dialog nobody can close
+        self.viewer.on_worker_failed = self.on_load_failed
+        self.process_events()
+
+    def on_load_failed(self, worker, error_title, error):
+        self.viewer.on_loading_done(worker)
+        self.load_error = f"{error_title}: {error}"
+
+    def process_events(self):
+        self.app.processEvents()
+
+    def wait_for_load(self, timeout=600):
+        deadline = time.perf_counter() + timeout
+        while True:
+            self.process_events()
+            viewer = self.viewer
+            if self.load_error is not None:
+                raise RuntimeError(self.load_error)
+            if viewer.load_worker is None and viewer.image_data is not None and viewer.volume_complete:
+                return
+            if time.perf_counter() > deadline:
+                raise TimeoutError("Loading did not finish")
+            time.sleep(0.001)
+
+    def load(self, start_loading):
+        self.load_error = None
+        start = time.perf_counter()
+        start_loading()
+        self.wait_for_load()
+        elapsed = time.perf_counter() - start
+        # Let background pyramid and layout builds settle before timing redraws
+        time.sleep(0.2)
+        self.process_events()
+        return summarize([elapsed])
+
+    def slice_indices(self, view):
+        count = self.viewer.display_shape[VIEW_AXIS[view]]
+        return [int(index) for index in np.linspace(0, count - 1, self.repeat)]
+
+    def time_update_single_view(self, view):
+        viewer = self.viewer
+        viewer.slice_cache.clear()
+        samples = []
+        for index in self.slice_indices(view):
+            viewer.current_slices[view] = index
+            start = time.perf_counter()
+            viewer.update_single_view(view)
+            samples.append(time.perf_counter() - start)
+        return summarize(samples)
+
+    def time_brightness_contrast(self, view):
+        viewer = self.viewer
+        image = viewer.extract_slice(view, viewer.current_slices[view])
+        return timed(lambda: viewer.apply_brightness_contrast(image), self.repeat)
+
+    def time_display(self, view, zoom_factor):
+        viewer = self.viewer
+        label = getattr(viewer, f"{view}_view")
+        viewer.zoom_factor = zoom_factor
+        viewer.slice_cache.clear()
+        samples = []
+        for index in self.slice_indices(view):
+            viewer.current_slices[view] = index
+            level = viewer.display_level(view, label.size())
+            # Extraction is timed by update_single_view; display_2d_image reuses this slice
+            viewer.current_slice(view, level)
+            start = time.perf_counter()
+            viewer.display_2d_image(label, view, level)
+            samples.append(time.perf_counter() - start)
+        viewer.zoom_factor = 1.0
+        return summarize(samples)
+
+    def time_cine(self):
+        """
+        Uncapped cine: every tick's repaints are flushed immediately, so this is the
+        highest frame rate the render path sustains rather than the timer's rate.
+        """
+        viewer = self.viewer
+        viewer.slice_cache.clear()
+        # Reset the cine counters and start prefetching, but drive the ticks from here
+        viewer.start_cine()
+        viewer.cine_timer.stop()
+        samples = []
+        for _ in range(self.cine_frames):
+            start = time.perf_counter()
+            viewer.cine_scroll()
+            viewer.render_scheduler.flush()
+            samples.append(time.perf_counter() - start)
+            self.process_events()
+        stats = summarize(samples)
+        stats["fps"] = len(samples) / sum(samples) if sum(samples) else 0.0
+        stats["slice_cache_hit_rate"] = viewer.slice_cache.stats()["hit_rate"]
+        viewer.prefetcher.cancel()
+        return stats
+
+    def time_3d_build(self):
+        viewer = self.viewer
+
+        def build():
+            viewer.volume_3d.clear()
+            viewer.create_3d_view()
+        return timed(build, max(1, self.repeat // 10))
+
+    def run_dataset(self, dataset, start_loading, load_metric):
+        results = [{"dataset": dataset, "metric": load_metric, **self.load(start_loading)}]
+        for view in VIEWS:
+            results.append({"dataset": dataset, "metric": f"update_single_view.{view}",
+                            **self.time_update_single_view(view)})
+            results.append({"dataset": dataset, "metric": f"apply_brightness_contrast.{view}",
+                            **self.time_brightness_contrast(view)})
+            for zoom_factor in ZOOM_FACTORS:
+                results.append({"dataset": dataset, "metric": f"display_2d_image.{view}.zoom{zoom_factor:g}",
+                                **self.time_display(view, zoom_factor)})
+        results.append({"dataset": dataset, "metric": "cine_scroll", **self.time_cine()})
+        results.append({"dataset": dataset, "metric": "create_3d_view", **self.time_3d_build()})
+        return results
+
+    def close(self):
+        self.viewer.close()
+        self.process_events()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    return {
+        "commit": git_commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "nibabel": nib.__version__,
+        "pydicom": pydicom.__version__,
+        "vtk": vtk.vtkVersion.GetVTKVersion(),
+        "qt": QT_VERSION_STR,
+        "pyqt": PYQT_VERSION_STR,
+        "qpa_platform": os.environ.get("QT_QPA_PLATFORM"),
+    }
+
+
+def run(sizes, nifti_dtypes, repeat, cine_frames, work_dir):
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    datasets = []
+    for size in sizes:
+        shape = SIZES[size]
+        dicom_folder = os.path.join(work_dir, f"dicom_{size}")
+        write_dicom_series(dicom_folder, synthetic_volume(shape, np.int16))
+        datasets.append((f"dicom_{size}_int16", "load_dicom_series",
+                         lambda viewer, folder=dicom_folder: viewer.load_dicom_series(folder)))
+        for dtype in nifti_dtypes:
+            nifti_path = os.path.join(work_dir, f"nifti_{size}_{dtype}.nii")
+            write_nifti(nifti_path, synthetic_volume(shape, dtype))
+            datasets.append((f"nifti_{size}_{dtype}", "load_nifti_file",
+                             lambda viewer, path=nifti_path: viewer.load_nifti_file(path)))
+
+    results = []
+    for dataset, load_metric, load in datasets:
+        # A fresh window per dataset, so caches and derived copies never carry over
+        benchmark = ViewerBenchmark(app, repeat, cine_frames)
+        dataset_results = benchmark.run_dataset(dataset, lambda: load(benchmark.viewer), load_metric)
+        benchmark.close()
+        for result in dataset_results:
+            print(f"{dataset:24} {result['metric']:36} {result['median_ms']:9.2f} ms", flush=True)
+        results += dataset_results
+    return results
+
+
+def compare(baseline_path, current_path, threshold=0.1):
+    """
+    Print the median change of every metric present in both files; returns the number of
+    metrics that got slower by more than threshold.
+    """
+    with open(baseline_path) as baseline_file, open(current_path) as current_file:
+        baseline, current = json.load(baseline_file), json.load(current_file)
+    before = {(result["dataset"], result["metric"]): result["median_ms"] for result in baseline["results"]}
+    print(f"baseline {baseline['environment'].get('commit')} -> current {current['environment'].get('commit')}")
+    slower = 0
+    for result in current["results"]:
+        key = (result["dataset"], result["metric"])
+        if key not in before:
+            continue
+        change = (result["median_ms"] - before[key]) / before[key] if before[key] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  SLOWER"
+            slower += 1
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{key[0]:24} {key[1]:36} {before[key]:9.2f} -> {result['median_ms']:9.2f} ms "
+              f"({change:+.0%}){flag}")
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the viewer's loading and rendering paths offscreen.")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["small", "medium"])
+    parser.add_argument("--nifti-dtypes", nargs="+", choices=list(NIFTI_DTYPES), default=list(NIFTI_DTYPES))
+    parser.add_argument("--repeat", type=int, default=20, help="timed calls per metric")
+    parser.add_argument("--cine-frames", type=int, default=120)
+    parser.add_argument("--output", "-o", default="benchmark_results.json")
+    parser.add_argument("--work-dir", help="where synthetic data is written (default: a temporary folder)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="compare two result files instead of running")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    if args.compare:
+        return 1 if compare(*args.compare) else 0
+
+    # The viewer logs every load and cache reset at debug level
+    logging.getLogger().setLevel(logging.WARNING)
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="mpr_benchmark_")
+    try:
+        results = run(args.sizes, tuple(args.nifti_dtypes), args.repeat, args.cine_frames, work_dir)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    with open(args.output, "w") as output:
+        json.dump({"environment": environment(), "results": results}, output, indent=2)
+    print(f"Saved {len(results)} results to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import numpy as np
+import pydicom
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def list_dicom_files(folder_path):
+    return sorted(os.path.join(folder_path, f) for f in os.listdir(folder_path) if f.lower().endswith('.dcm'))
+
+
+def read_header(file_path):
+    return pydicom.dcmread(file_path, stop_before_pixels=True)
+
+
+def read_pixels(file_path):
+    # Module level so process pools can pickle it
+    return pydicom.dcmread(file_path).pixel_array
+
+
+def slice_position(header):
+    """
+    Position of a slice along the series normal, taken from ImagePositionPatient and
+    ImageOrientationPatient. Falls back to InstanceNumber, or None when neither is present.
+    """
+    position = getattr(header, "ImagePositionPatient", None)
+    orientation = getattr(header, "ImageOrientationPatient", None)
+    if position is not None and orientation is not None and len(orientation) == 6:
+        normal = np.cross(np.asarray(orientation[:3], dtype=float), np.asarray(orientation[3:], dtype=float))
+        return float(np.dot(normal, np.asarray(position, dtype=float)))
+    instance = getattr(header, "InstanceNumber", None)
+    return float(instance) if instance is not None else None
+
+
+def integer_range(bits_stored, signed):
+    if signed:
+        return -(2 ** (bits_stored - 1)), 2 ** (bits_stored - 1) - 1
+    return 0, 2 ** bits_stored - 1
+
+
+class DicomSeries:
+    """
+    Header-only description of one DICOM series.
+    - files are sorted along the patient axis (ImagePositionPatient, then InstanceNumber).
+    - dtype is the smallest type that holds the rescaled (RescaleSlope/Intercept) values.
+    """
+
+    def __init__(self, uid, entries):
+        entries = sorted(entries, key=lambda entry: (entry[2] is None, entry[2] or 0.0, entry[0]))
+        self.uid = uid
+        self.fingerprint = None  # Folder fingerprint, set when the series is listed in a volume cache
+        self.files = [file_path for file_path, _, _ in entries]
+        headers = [header for _, header, _ in entries]
+        first = headers[0]
+
+        self.description = str(getattr(first, "SeriesDescription", "") or uid)
+        self.shape = (len(headers), int(first.Rows), int(first.Columns))
+        self.slopes = np.array([float(getattr(h, "RescaleSlope", 1) or 1) for h in headers])
+        self.intercepts = np.array([float(getattr(h, "RescaleIntercept", 0) or 0) for h in headers])
+
+        pixel_spacing = getattr(first, "PixelSpacing", None) or [1.0, 1.0]
+        positions = [position for _, _, position in entries if position is not None]
+        slice_spacing = float(np.median(np.diff(positions))) if len(positions) > 1 else \
+            float(getattr(first, "SliceThickness", 1.0) or 1.0)
+        self.spacing = (abs(slice_spacing) or 1.0, float(pixel_spacing[0]), float(pixel_spacing[1]))
+
+        self.dtype = self.output_dtype(int(getattr(first, "BitsStored", first.BitsAllocated)),
+                                       int(getattr(first, "PixelRepresentation", 0)) == 1)
+
+    def output_dtype(self, bits_stored, signed):
+        integral = np.all(self.slopes == np.round(self.slopes)) and np.all(self.intercepts == np.round(self.intercepts))
+        if not integral:
+            return np.dtype(np.float32)
+        low, high = integer_range(bits_stored, signed)
+        bounds = np.concatenate([self.slopes * low + self.intercepts, self.slopes * high + self.intercepts])
+        for dtype in (np.uint8, np.int8, np.uint16, np.int16, np.int32):
+            info = np.iinfo(dtype)
+            if info.min <= bounds.min() and bounds.max() <= info.max:
+                return np.dtype(dtype)
+        return np.dtype(np.float32)
+
+    def __len__(self):
+        return len(self.files)
+
+    def allocate(self):
+        return np.empty(self.shape, dtype=self.dtype)
+
+    def store(self, volume, index, pixels):
+        if pixels.shape != self.shape[1:]:
+            raise ValueError(f"{self.files[index]} has shape {pixels.shape}, expected {self.shape[1:]}")
+        slope, intercept = self.slopes[index], self.intercepts[index]
+        if slope == 1 and intercept == 0:
+            volume[index] = pixels
+        elif volume.dtype.kind == "f":
+            volume[index] = pixels * np.float32(slope) + np.float32(intercept)
+        else:
+            volume[index] = pixels.astype(np.int32) * int(slope) + int(intercept)
+
+
+def scan_dicom_folder(folder_path, workers=None):
+    """
+    Header-only pass over a folder: returns the series found, largest first.
+    """
+    files = list_dicom_files(folder_path)
+    with ThreadPoolExecutor(max_workers=workers or default_workers()) as executor:
+        headers = list(executor.map(read_header, files))
+
+    groups = {}
+    for file_path, header in zip(files, headers):
+        if not hasattr(header, "Rows"):
+            logging.debug("Skipping %s: no image pixel module", file_path)
+            continue
+        uid = str(getattr(header, "SeriesInstanceUID", ""))
+        groups.setdefault(uid, []).append((file_path, header, slice_position(header)))
+
+    series = [DicomSeries(uid, entries) for uid, entries in groups.items()]
+    return sorted(series, key=len, reverse=True)
+
+
+def decode_series(series, volume=None, workers=None, use_processes=False, order=None,
+                  progress=None, cancelled=None):
+    """
+    Decode pixel data straight into a preallocated volume.
+    - order: slice indices in the order they should be decoded (default: first to last).
+    - progress(index, done, total) is called after each slice is written.
+    - cancelled() is polled between slices; decoding stops early when it returns True.
+    """
+    if volume is None:
+        volume = series.allocate()
+    order = list(range(len(series))) if order is None else list(order)
+    workers = workers or default_workers()
+    done = 0
+
+    def finish(index):
+        nonlocal done
+        done += 1
+        if progress is not None:
+            progress(index, done, len(order))
+
+    if use_processes:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [(index, executor.submit(read_pixels, series.files[index])) for index in order]
+            for index, future in futures:
+                if cancelled is not None and cancelled():
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    break
+                series.store(volume, index, future.result())
+                finish(index)
+    else:
+        def decode(index):
+            if cancelled is not None and cancelled():
+                return None
+            series.store(volume, index, read_pixels(series.files[index]))
+            return index
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for index in executor.map(decode, order):
+                if index is not None:
+                    finish(index)
+    return volume
+
+
+def load_dicom_volume(folder_path, workers=None, use_processes=False):
+    series = scan_dicom_folder(folder_path, workers)
+    if not series:
+        raise ValueError(f"No DICOM files found in {folder_path}")
+    return decode_series(series[0], workers=workers, use_processes=use_processes)
@@ -0,0 +1,36 @@
+import os
+
+import numpy as np
+from PyQt6.QtGui import QImage
+
+
+def numpy_to_qimage(array):
+    """
+    Wrap a 2D uint8 array as a grayscale QImage without copying its pixels.
+    The array is kept on the returned wrapper so the buffer lives as long as the image.
+    """
+    array = np.ascontiguousarray(array)
+    height, width = array.shape
+    image = QImage(array.data, width, height, array.strides[0], QImage.Format.Format_Grayscale8)
+    image.buffer = array
+    return image
+
+
+def rgba_to_qimage(array):
+    """
+    Wrap a (rows, columns, 4) uint8 RGBA array as a QImage without copying its pixels.
+    """
+    array = np.ascontiguousarray(array)
+    height, width = array.shape[:2]
+    image = QImage(array.data, width, height, array.strides[0], QImage.Format.Format_RGBA8888)
+    image.buffer = array
+    return image
+
+
+def save_png(array, file_path):
+    """
+    Write a 2D uint8 array as an 8-bit grayscale PNG. Needs no QApplication.
+    """
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    if not numpy_to_qimage(array).save(file_path, "PNG"):
+        raise OSError(f"Could not write {file_path}")
@@ -0,0 +1,187 @@
+import threading
+import time
+import logging
+
+import numpy as np
+
+from volume_layout import OrthogonalLayouts
+
+
+def compact_labels(labels):
+    """
+    A label map as an 8- or 16-bit integer array. Such arrays are returned unchanged (a
+    memory-mapped file stays mapped); other integer or integral float arrays are copied
+    into the smallest type that holds their values.
+    """
+    if labels.dtype.kind in "iu" and labels.dtype.itemsize <= 2:
+        return labels
+    if labels.dtype.kind not in "iuf":
+        raise ValueError(f"Labels of type {labels.dtype} are not supported")
+    low, high = np.min(labels), np.max(labels)
+    for dtype in (np.uint8, np.int16, np.uint16):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            compact = labels.astype(dtype)
+            if labels.dtype.kind == "f" and not np.array_equal(compact, labels):
+                raise ValueError("Label values must be whole numbers")
+            logging.debug("Labels converted from %s to %s", labels.dtype, compact.dtype)
+            return compact
+    raise ValueError(f"Label values {low:g}..{high:g} do not fit in 16 bits")
+
+
+class LabelOverlay:
+    """
+    A label map drawn over the grayscale slices in color.
+    - Labels stay in their stored 8/16-bit type. A slice is colorized by indexing an RGBA
+      table with its bit pattern, one row per possible value, so no per-pixel arithmetic is
+      done. Label 0 and hidden labels have alpha 0; a label's alpha is its own opacity
+      (default 1) times the overlay opacity. Changing any of them rebuilds the table and
+      bumps version.
+    - An index built in one chunked pass on a background thread holds, for every slice of
+      each view, the bounding box of its labelled voxels in the stored slice's (row, column)
+      layout, or nothing for an empty slice. It comes from three "any label" projections of
+      the volume (z/y, z/x and y/x), so it takes a few bytes per slice row.
+    - The index also counts the voxels of every label value.
+    """
+    PALETTE = np.array([(230, 25, 75), (60, 180, 75), (255, 225, 25), (0, 130, 200), (245, 130, 48),
+                        (145, 30, 180), (70, 240, 240), (240, 50, 230), (210, 245, 60), (250, 190, 212),
+                        (0, 128, 128), (170, 110, 40)], dtype=np.uint8)
+
+    def __init__(self, opacity=0.5, chunk=16, on_ready=None):
+        self.opacity = opacity
+        self.chunk = chunk
+        self.on_ready = on_ready
+        self.labels = None
+        self.generation = 0
+        self.version = 0
+        self.colors = {}
+        self.label_opacity = {}
+        self.hidden = set()
+        self.index = None
+        self.table = None
+
+    @property
+    def ready(self):
+        return self.index is not None
+
+    def set_labels(self, labels):
+        self.generation += 1
+        self.labels = labels
+        self.index = None
+        self.colors, self.label_opacity, self.hidden = {}, {}, set()
+        self.table = None
+        if labels is not None:
+            self.rebuild_table()
+            threading.Thread(target=self.build, args=(labels, self.generation), daemon=True).start()
+
+    def build(self, labels, generation):
+        start_time = time.perf_counter()
+        unsigned = np.dtype(f"u{labels.dtype.itemsize}")
+        dim_z, dim_y, dim_x = labels.shape
+        zy = np.zeros((dim_z, dim_y), dtype=bool)
+        zx = np.zeros((dim_z, dim_x), dtype=bool)
+        yx = np.zeros((dim_y, dim_x), dtype=bool)
+        counts = np.zeros(len(self.table), dtype=np.int64)
+        for start in range(0, dim_z, self.chunk):
+            if generation != self.generation:
+                return
+            block = np.asarray(labels[start:start + self.chunk])
+            mask = block != 0
+            zy[start:start + len(block)] = mask.any(axis=2)
+            zx[start:start + len(block)] = mask.any(axis=1)
+            yx |= mask.any(axis=0)
+            counts += np.bincount(block.view(unsigned).ravel(), minlength=len(counts))
+
+        # Per slice: rows from the projection along the slice's columns, columns from the one along its rows
+        bounds = {"axial": self.spans(zy, zx), "coronal": self.spans(zy.T, yx), "sagittal": self.spans(zx.T, yx.T)}
+        rows = np.flatnonzero(counts)
+        values = rows.astype(unsigned).view(labels.dtype)
+        if generation != self.generation:
+            return
+        self.index = {"bounds": bounds,
+                      "counts": {int(value): int(counts[row]) for value, row in zip(values, rows) if value != 0},
+                      "seconds": time.perf_counter() - start_time}
+        logging.debug("Label index ready in %.2f s: %d labels", self.index["seconds"], len(self.index["counts"]))
+        if self.on_ready is not None:
+            self.on_ready()
+
+    @staticmethod
+    def spans(rows, columns):
+        """
+        (first row, last row, first column, last column) per slice from (slice, row) and
+        (slice, column) occupancy; -1 for empty slices.
+        """
+        bounds = np.stack([rows.argmax(axis=1), rows.shape[1] - 1 - rows[:, ::-1].argmax(axis=1),
+                           columns.argmax(axis=1), columns.shape[1] - 1 - columns[:, ::-1].argmax(axis=1)], axis=1)
+        bounds[~rows.any(axis=1)] = -1
+        return bounds
+
+    def present(self):
+        """
+        Label values in the map (0 excluded) with their voxel counts, once the index is ready.
+        """
+        return self.index["counts"] if self.index is not None else {}
+
+    def color(self, value):
+        if value in self.colors:
+            return self.colors[value]
+        return tuple(int(channel) for channel in self.PALETTE[(value - 1) % len(self.PALETTE)])
+
+    def set_label(self, value, color=None, opacity=None, visible=None):
+        if color is not None:
+            self.colors[value] = tuple(color)
+        if opacity is not None:
+            self.label_opacity[value] = opacity
+        if visible is not None:
+            if visible:
+                self.hidden.discard(value)
+            else:
+                self.hidden.add(value)
+        self.rebuild_table()
+
+    def set_opacity(self, opacity):
+        self.opacity = opacity
+        self.rebuild_table()
+
+    def row(self, value):
+        # Row n of the table is the label whose bit pattern is n, so signed maps need no offset
+        return int(np.array(value, dtype=self.labels.dtype).view(f"u{self.labels.dtype.itemsize}"))
+
+    def rebuild_table(self):
+        itemsize = self.labels.dtype.itemsize
+        values = np.arange(2 ** (8 * itemsize), dtype=np.dtype(f"u{itemsize}")).view(self.labels.dtype)
+        table = np.empty((len(values), 4), dtype=np.uint8)
+        table[:, :3] = self.PALETTE[(values.astype(np.int64) - 1) % len(self.PALETTE)]
+        table[:, 3] = round(255 * self.opacity)
+        for value, color in self.colors.items():
+            table[self.row(value), :3] = color
+        for value, opacity in self.label_opacity.items():
+            table[self.row(value), 3] = round(255 * self.opacity * opacity)
+        for value in self.hidden | {0}:
+            table[self.row(value), 3] = 0
+        self.table = table
+        self.version += 1
+
+    def slice(self, view, index):
+        return OrthogonalLayouts.SLICE[view](self.labels, index)
+
+    def bounds(self, view, index):
+        """
+        Bounding box (row0, row1, column0, column1), inclusive, of the labels on a stored
+        slice; None for a slice without labels. The whole slice until the index is ready.
+        """
+        if self.index is None:
+            shape = self.slice(view, index).shape
+            return 0, shape[0] - 1, 0, shape[1] - 1
+        box = self.index["bounds"][view][index]
+        return None if box[0] < 0 else tuple(int(value) for value in box)
+
+    def colorize(self, labels):
+        """
+        Contiguous (rows, columns, 4) RGBA image of a 2D block of labels.
+        """
+        return self.table[labels.view(f"u{labels.dtype.itemsize}")]
+
+    def stats(self):
+        return {"ready": self.ready, "labels": len(self.present()), "opacity": self.opacity,
+                "hidden": sorted(self.hidden), "seconds": self.index["seconds"] if self.index is not None else None}
@@ -0,0 +1,187 @@
+import os
+import gzip
+import shutil
+import hashlib
+import logging
+import threading
+
+import numpy as np
+import nibabel as nib
+
+
+def default_cache_dir():
+    return os.path.join(os.path.expanduser("~"), ".cache", "mpr_viewer", "nifti")
+
+
+def sample_range(volume, max_slices=32):
+    """
+    Intensity range estimated from up to max_slices evenly spaced axial slices, so a
+    memory-mapped volume is not read in full just to set up the display window.
+    """
+    step = max(1, volume.shape[0] // max_slices)
+    sample = volume[::step]
+    return float(np.min(sample)), float(np.max(sample))
+
+
+class NiftiVolume:
+    """
+    NIfTI image mapped from disk in its native dtype.
+    - data is a (z, y, x) C-ordered view of the file's Fortran-ordered (x, y, z) voxels,
+      matching the (slice, row, column) layout of DICOM volumes.
+    - slope and intercept are the header scaling; they are applied by the display lookup
+      table instead of being multiplied into the array.
+    - .nii.gz files are decompressed once and mapped from there: into volume_cache (a
+      VolumeCache, whose size budget and eviction then cover them) when given, else into
+      cache_dir.
+    - Files with more than three dimensions are time series: the extra dimensions are
+      flattened into frame_count frames, frame() maps one of them and data is the first.
+      A .nii.gz series that is not in the cache yet is decompressed in the background,
+      and each frame can be read as soon as its bytes are on disk.
+    """
+
+    def __init__(self, file_path, cache_dir=None, volume_cache=None):
+        self.file_path = file_path
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.volume_cache = volume_cache
+        self.image = nib.load(file_path)
+        self.proxy = self.image.dataobj
+        self.header = self.image.header
+
+        self.dtype = self.header.get_data_dtype()
+        self.file_shape = tuple(self.proxy.shape)
+        self.slope = float(self.proxy.slope)
+        self.intercept = float(self.proxy.inter)
+        zooms = self.header.get_zooms()[:3]
+        self.spacing = tuple(float(zoom) for zoom in reversed(zooms)) + (1.0,) * (3 - len(zooms))
+        self.frame_count = int(np.prod(self.file_shape[3:])) if len(self.file_shape) > 3 else 1
+        self.frame_bytes = int(np.prod(self.file_shape[:3])) * self.dtype.itemsize
+
+        self.partial_path = None  # Frames are read from here during decompression; the final path once renamed
+        self.ready_bytes = 0
+        self.error = None
+        self.closed = False
+        self.progress = threading.Condition()
+        self.raw = self.map_raw()
+        self.data = self.frame(0)
+
+    def map_raw(self):
+        if not self.file_path.endswith(".gz"):
+            return np.memmap(self.file_path, dtype=self.dtype, mode="r", offset=int(self.proxy.offset),
+                             shape=self.file_shape, order="F")
+        path = self.raw_path()
+        if self.frame_count > 1 and not os.path.exists(path):
+            threading.Thread(target=self.decompress_series, args=(path,), daemon=True).start()
+            return None
+        return np.memmap(self.decompressed_path(), dtype=self.dtype, mode="r", shape=self.file_shape, order="F")
+
+    def frame(self, index=0):
+        """
+        (z, y, x) view of one time frame. While a .nii.gz series is still being decompressed
+        this blocks until the frame is on disk.
+        """
+        raw = self.raw if self.raw is not None else self.wait_for_frame(index)
+        if raw is None:
+            # The lock keeps the partial file from being renamed while it is opened
+            with self.progress:
+                return np.memmap(self.partial_path, dtype=self.dtype, mode="r", offset=index * self.frame_bytes,
+                                 shape=self.file_shape[:3], order="F").T
+        if raw.ndim <= 3:
+            return raw.T
+        return raw.reshape(self.file_shape[:3] + (self.frame_count,), order="F")[..., index].T
+
+    def frame_ready(self, index):
+        return self.raw is not None or self.ready_bytes >= (index + 1) * self.frame_bytes
+
+    def wait_for_frame(self, index):
+        with self.progress:
+            while not self.frame_ready(index) and self.error is None and not self.closed:
+                self.progress.wait()
+        if self.error is not None:
+            raise self.error
+        if self.closed and not self.frame_ready(index):
+            raise ValueError(f"{self.file_path} was closed while it was being decompressed")
+        return self.raw
+
+    def decompress_series(self, path):
+        def progress(written):
+            with self.progress:
+                self.ready_bytes = written
+                self.progress.notify_all()
+            return not self.closed
+
+        try:
+            self.decompress(path, progress)
+            raw = np.memmap(path, dtype=self.dtype, mode="r", shape=self.file_shape, order="F")
+        except BaseException as e:
+            with self.progress:
+                self.error = e
+                self.progress.notify_all()
+            if not self.closed:
+                logging.exception("Decompressing %s failed", self.file_path)
+            return
+        with self.progress:
+            self.raw = raw
+            self.progress.notify_all()
+
+    def close(self):
+        """
+        Stop a background decompression; frames already returned stay readable.
+        """
+        with self.progress:
+            self.closed = True
+            self.progress.notify_all()
+
+    def cache_key(self):
+        stat = os.stat(self.file_path)
+        source = f"{os.path.abspath(self.file_path)}|{stat.st_mtime_ns}|{stat.st_size}"
+        return hashlib.sha1(source.encode()).hexdigest()
+
+    def raw_path(self):
+        key = self.cache_key()
+        if self.volume_cache is not None:
+            return self.volume_cache.nifti_path(key)
+        return os.path.join(self.cache_dir, key + ".raw")
+
+    def decompressed_path(self):
+        path = self.raw_path()
+        if not os.path.exists(path):
+            self.decompress(path)
+        elif self.volume_cache is not None:
+            self.volume_cache.touch(self.cache_key())
+        return path
+
+    def decompress(self, path, progress=None):
+        """
+        Decompress the voxel data into path through a partial file. progress, if given, is
+        called with the bytes written after each chunk and stops the copy by returning False.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        nbytes = int(np.prod(self.file_shape)) * self.dtype.itemsize
+        self.partial_path = f"{path}.{os.getpid()}.part"
+        logging.debug("Decompressing %s into %s", self.file_path, path)
+        try:
+            with gzip.open(self.file_path, "rb") as source, open(self.partial_path, "wb") as target:
+                source.seek(int(self.proxy.offset))
+                if progress is None:
+                    shutil.copyfileobj(source, target, 16 * 1024 * 1024)
+                else:
+                    while target.tell() < nbytes:
+                        chunk = source.read(16 * 1024 * 1024)
+                        if not chunk:
+                            break
+                        target.write(chunk)
+                        target.flush()
+                        if not progress(min(target.tell(), nbytes)):
+                            raise ValueError(f"Decompression of {self.file_path} was stopped")
+                if target.tell() < nbytes:
+                    raise ValueError(f"{self.file_path} is truncated")
+                target.truncate(nbytes)
+            with self.progress:
+                os.replace(self.partial_path, path)
+                self.partial_path = path
+        except BaseException:
+            if os.path.exists(self.partial_path):
+                os.remove(self.partial_path)
+            raise
+        if self.volume_cache is not None:
+            self.volume_cache.evict(keep=self.cache_key())
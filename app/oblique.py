@@ -0,0 +1,179 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def rotation_matrix(tilt_x, tilt_y):
+    """
+    Rotation in (x, y, z) physical coordinates: tilt_x degrees about the x axis followed
+    by tilt_y degrees about the y axis. Columns are the plane's column, row and normal directions.
+    """
+    a, b = np.radians(tilt_x), np.radians(tilt_y)
+    about_x = np.array([[1.0, 0.0, 0.0], [0.0, np.cos(a), -np.sin(a)], [0.0, np.sin(a), np.cos(a)]])
+    about_y = np.array([[np.cos(b), 0.0, np.sin(b)], [0.0, 1.0, 0.0], [-np.sin(b), 0.0, np.cos(b)]])
+    return about_y @ about_x
+
+
+def lower_corner(position, size):
+    """
+    Lower interpolation corner and fraction along one axis. Corners stop one voxel short of
+    the far edge, so the upper corner is always a fixed step away.
+    """
+    corner = np.clip(np.floor(position), 0, max(size - 2, 0)).astype(np.intp)
+    return corner, np.subtract(position, corner, dtype=np.float32)
+
+
+def sample_volume(volume, coords, order=1, fill=0):
+    """
+    Sample a (z, y, x) volume at float voxel coordinates coords (3, n), in (z, y, x) order.
+    - order 0 is nearest-neighbour, order 1 trilinear.
+    - Points outside the volume get fill. Integer volumes keep their dtype (rounded), so
+      the result goes through the same lookup table as an ordinary slice.
+    """
+    depth, height, width = volume.shape
+    z, y, x = coords
+    inside = ((z > -0.5) & (z < depth - 0.5) & (y > -0.5) & (y < height - 0.5)
+              & (x > -0.5) & (x < width - 0.5))
+
+    # Contiguous volumes are read through flat indices, which is much faster than three index arrays
+    flat = volume.reshape(-1) if volume.flags.c_contiguous else None
+    if order == 0:
+        zi, yi, xi = (np.clip(np.rint(axis), 0, size - 1).astype(np.intp) for axis, size in zip(coords, volume.shape))
+        result = np.take(flat, (zi * height + yi) * width + xi) if flat is not None else volume[zi, yi, xi]
+        result[~inside] = fill
+        return result
+
+    z0, fz = lower_corner(z, depth)
+    y0, fy = lower_corner(y, height)
+    x0, fx = lower_corner(x, width)
+    steps = (int(depth > 1), int(height > 1), int(width > 1))
+    if flat is not None:
+        # Upper corners are constant offsets from one flat base index
+        base = (z0 * height + y0) * width + x0
+        strides = (height * width, width, 1)
+
+        def read(dz, dy, dx):
+            offset = sum(step * stride for step, stride in zip((dz, dy, dx), strides))
+            return np.take(flat, base + offset if offset else base)
+    else:
+        def read(dz, dy, dx):
+            return volume[z0 + dz, y0 + dy, x0 + dx]
+
+    def lerp_x(dz, dy):
+        low = read(dz, dy, 0).astype(np.float32)
+        return low + (read(dz, dy, steps[2]) - low) * fx
+
+    def lerp_y(dz):
+        low = lerp_x(dz, 0)
+        return low + (lerp_x(dz, steps[1]) - low) * fy
+
+    low = lerp_y(0)
+    result = low + (lerp_y(steps[0]) - low) * fz
+    result[~inside] = fill
+    if volume.dtype.kind in "iu":
+        return np.rint(result, out=result).astype(volume.dtype)
+    return result.astype(volume.dtype, copy=False)
+
+
+class ObliqueReslicer:
+    """
+    Resample a volume along an arbitrary plane given by a point and a rotation.
+    - The plane passes through point (z, y, x voxels) with normal rotation[:, 2]. Its output
+      grid is centred on the projection of the volume centre and has the axial slice's shape
+      and pixel spacing, so a zero rotation reproduces the axial slice through the point.
+    - Sampling grids depend only on the rotation, output shape and voxel spacing, and are
+      kept in a small LRU. Moving the plane along its normal or dragging the point only
+      adds a new origin to a cached grid.
+    """
+
+    def __init__(self, max_grids=4):
+        self.max_grids = max_grids
+        self.grids = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def frame(shape, spacing, point, rotation):
+        """
+        Physical (x, y, z) position of output pixel (0, 0) and the physical steps of one
+        output column and one output row.
+        """
+        spacing_xyz = np.array(spacing[::-1], dtype=np.float64)
+        point_xyz = np.array(point[::-1], dtype=np.float64) * spacing_xyz
+        centre = (np.array(shape[::-1], dtype=np.float64) - 1) / 2 * spacing_xyz
+        column, row, normal = rotation[:, 0], rotation[:, 1], rotation[:, 2]
+        centre = centre - np.dot(centre - point_xyz, normal) * normal
+        column_step = column * spacing_xyz[0]
+        row_step = row * spacing_xyz[1]
+        origin = centre - (shape[2] - 1) / 2 * column_step - (shape[1] - 1) / 2 * row_step
+        return origin, column_step, row_step
+
+    def grid(self, shape, spacing, rotation):
+        """
+        (3, rows * columns) voxel offsets from output pixel (0, 0), in (z, y, x) order.
+        """
+        key = (rotation.round(9).tobytes(), shape[1:], tuple(spacing))
+        with self.lock:
+            grid = self.grids.get(key)
+            if grid is not None:
+                self.grids.move_to_end(key)
+                self.hits += 1
+                return grid
+            self.misses += 1
+
+        _, column_step, row_step = self.frame(shape, spacing, (0.0, 0.0, 0.0), rotation)
+        # Physical (x, y, z) steps in voxel units, reordered to (z, y, x)
+        column_step = (column_step / np.array(spacing[::-1]))[::-1].astype(np.float32)
+        row_step = (row_step / np.array(spacing[::-1]))[::-1].astype(np.float32)
+        rows = np.arange(shape[1], dtype=np.float32)
+        columns = np.arange(shape[2], dtype=np.float32)
+        grid = (rows[None, :, None] * row_step[:, None, None]
+                + columns[None, None, :] * column_step[:, None, None]).reshape(3, -1)
+
+        with self.lock:
+            self.grids[key] = grid
+            while len(self.grids) > self.max_grids:
+                self.grids.popitem(last=False)
+        return grid
+
+    def reslice(self, volume, point, rotation, spacing=(1.0, 1.0, 1.0), order=1, fill=0):
+        """
+        (rows, columns) oblique slice of volume, with the same shape as its axial slices.
+        """
+        origin, _, _ = self.frame(volume.shape, spacing, point, rotation)
+        origin = (origin / np.array(spacing[::-1]))[::-1].astype(np.float32)
+        coords = self.grid(volume.shape, spacing, rotation) + origin[:, None]
+        return sample_volume(volume, coords, order, fill).reshape(volume.shape[1:])
+
+    def to_voxel(self, shape, spacing, point, rotation, row, column):
+        """
+        (z, y, x) voxel coordinates of output pixel (row, column).
+        """
+        origin, column_step, row_step = self.frame(shape, spacing, point, rotation)
+        position = origin + column * column_step + row * row_step
+        return tuple((position / np.array(spacing[::-1]))[::-1])
+
+    def to_plane(self, shape, spacing, point, rotation):
+        """
+        (row, column) output pixel of point, which always lies in the plane.
+        """
+        origin, column_step, row_step = self.frame(shape, spacing, point, rotation)
+        offset = np.array(point[::-1], dtype=np.float64) * np.array(spacing[::-1]) - origin
+        return (np.dot(offset, row_step) / np.dot(row_step, row_step),
+                np.dot(offset, column_step) / np.dot(column_step, column_step))
+
+    def transform(self, shape, spacing, point, rotation):
+        """
+        4x4 matrix taking plane coordinates (column * column spacing, row * row spacing, 0)
+        to physical (x, y, z), for placing the oblique slice in the 3D view.
+        """
+        origin, _, _ = self.frame(shape, spacing, point, rotation)
+        matrix = np.eye(4)
+        matrix[:3, :3] = rotation
+        matrix[:3, 3] = origin
+        return matrix
+
+    def stats(self):
+        return {"grids": len(self.grids), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,119 @@
+import numpy as np
+
+
+def display_flip(view, image):
+    """
+    Sagittal and coronal slices are shown upside down relative to the array (last slice at
+    the top); axial slices are shown as stored. Shared by the viewer and batch export.
+    """
+    if view in ("sagittal", "coronal"):
+        return image[::-1]  # Flip vertically
+    return image
+
+
+class Orientation:
+    """
+    In-plane rotations and flips of the displayed volume, kept as an index remapping of the
+    stored (z, y, x) volume instead of a rotated copy or view of it.
+    - The displayed volume's row (y) and column (x) axes each read one stored in-plane axis,
+      possibly reversed; the slice axis is always z.
+    - A displayed slice is read as the matching stored slice, then transposed or reversed
+      as a view, so the stored volume, its derived copies and the 3D data never change.
+    - rotated() turns the same way as np.rot90(volume, axes=(1, 2)).
+    """
+    VIEW_AXIS = {"axial": 0, "sagittal": 2, "coronal": 1}
+    AXIS_VIEW = {0: "axial", 1: "coronal", 2: "sagittal"}
+
+    def __init__(self, axes=(1, 2), flips=(False, False)):
+        self.axes = axes  # Stored axis read by the displayed rows and columns
+        self.flips = flips
+
+    def rotated(self, turns=1):
+        """
+        A new orientation; instances are never changed, so worker threads can hold one safely.
+        """
+        axes, flips = self.axes, self.flips
+        for _ in range(turns % 4):
+            axes, flips = (axes[1], axes[0]), (not flips[1], flips[0])
+        return Orientation(axes, flips)
+
+    def key(self):
+        return self.axes, self.flips
+
+    def shape(self, shape):
+        """
+        Displayed (z, y, x) shape of a stored volume shape.
+        """
+        return shape[0], shape[self.axes[0]], shape[self.axes[1]]
+
+    def spacing(self, spacing):
+        return spacing[0], spacing[self.axes[0]], spacing[self.axes[1]]
+
+    def to_source(self, point, shape):
+        """
+        Stored (z, y, x) position of a displayed (z, y, x) position; positions may be fractional.
+        """
+        source = [point[0], 0, 0]
+        for displayed, axis, flipped in zip(point[1:], self.axes, self.flips):
+            source[axis] = shape[axis] - 1 - displayed if flipped else displayed
+        return tuple(source)
+
+    def from_source(self, point, shape):
+        return (point[0],) + tuple(shape[axis] - 1 - point[axis] if flipped else point[axis]
+                                   for axis, flipped in zip(self.axes, self.flips))
+
+    def source(self, view, index, shape):
+        """
+        Stored view and slice index holding the displayed slice at index.
+        """
+        axis = self.VIEW_AXIS[view]
+        if axis == 0:
+            return view, index
+        source_axis, flipped = self.axes[axis - 1], self.flips[axis - 1]
+        return self.AXIS_VIEW[source_axis], shape[source_axis] - 1 - index if flipped else index
+
+    def orient(self, view, image):
+        """
+        Turn a stored slice (from source()) into the displayed slice, as a view.
+        """
+        axis = self.VIEW_AXIS[view]
+        if axis == 0:
+            if self.axes[0] == 2:
+                image = image.T
+            return image[::-1 if self.flips[0] else 1, ::-1 if self.flips[1] else 1]
+        # The other displayed in-plane axis runs along the slice's columns
+        return image[:, ::-1] if self.flips[2 - axis] else image
+
+    def orient_box(self, view, box, size):
+        """
+        Displayed (row0, row1, column0, column1), inclusive, of a box on a stored slice of
+        (rows, columns) size, matching orient().
+        """
+        row0, row1, column0, column1 = box
+        rows, columns = size
+        axis = self.VIEW_AXIS[view]
+        if axis == 0:
+            if self.axes[0] == 2:
+                row0, row1, column0, column1, rows, columns = column0, column1, row0, row1, columns, rows
+            flips = self.flips
+        else:
+            flips = (False, self.flips[2 - axis])
+        if flips[0]:
+            row0, row1 = rows - 1 - row1, rows - 1 - row0
+        if flips[1]:
+            column0, column1 = columns - 1 - column1, columns - 1 - column0
+        return row0, row1, column0, column1
+
+    def matrix(self, shape, spacing):
+        """
+        4x4 matrix taking stored world (x, y, z) coordinates to displayed ones, for the 3D view.
+        """
+        matrix = np.zeros((4, 4))
+        matrix[2, 2] = matrix[3, 3] = 1.0
+        # World x is stored axis 2 and world y stored axis 1
+        for row, axis, flipped in ((1, self.axes[0], self.flips[0]), (0, self.axes[1], self.flips[1])):
+            column = 2 - axis
+            matrix[row, column] = -1.0 if flipped else 1.0
+            if flipped:
+                matrix[row, 3] = (shape[axis] - 1) * spacing[axis]
+        return matrix
@@ -0,0 +1,135 @@
+import json
+import time
+import threading
+from collections import deque
+
+import numpy as np
+
+
+class _Stage:
+    __slots__ = ("stats", "name", "start")
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NO_STAGE = _NoStage()
+
+
+class PerfStats:
+    """
+    Rolling latency samples and counters for named stages of the render path.
+    - with stats.stage("window"): ... times a block; record() and count() add samples directly.
+    - Each stage keeps its last `window` samples for percentiles and a histogram, plus the
+      end times of the last second of samples for a rate (frames per second).
+    - While disabled, stage() returns a shared no-op context and record()/count() return
+      at once, so the calls can stay in the hot path.
+    - Samples may come from worker threads.
+    """
+    # Upper bucket edges in milliseconds; the last bucket holds everything slower
+    HISTOGRAM_MS = (0.5, 1, 2, 4, 8, 16, 33, 66, 133)
+
+    def __init__(self, enabled=False, window=512):
+        self.enabled = enabled
+        self.window = window
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.samples = {}
+            self.ends = {}
+            self.totals = {}
+            self.counters = {}
+            self.started = time.time()
+
+    def set_enabled(self, enabled):
+        if enabled and not self.enabled:
+            self.reset()
+        self.enabled = enabled
+
+    def stage(self, name):
+        return _Stage(self, name) if self.enabled else NO_STAGE
+
+    def record(self, name, seconds):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        with self.lock:
+            if name not in self.samples:
+                self.samples[name] = deque(maxlen=self.window)
+                self.ends[name] = deque()
+                self.totals[name] = 0
+            self.samples[name].append(seconds)
+            ends = self.ends[name]
+            ends.append(now)
+            while ends and now - ends[0] > 1.0:
+                ends.popleft()
+            self.totals[name] += 1
+
+    def count(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def rate(self, name):
+        """
+        Samples recorded for name during the last second.
+        """
+        now = time.perf_counter()
+        with self.lock:
+            return sum(1 for end in self.ends.get(name, ()) if now - end <= 1.0)
+
+    def stage_stats(self, name):
+        with self.lock:
+            samples = np.array(self.samples.get(name, ()), dtype=np.float64) * 1000
+            total = self.totals.get(name, 0)
+        if not len(samples):
+            return None
+        edges = self.HISTOGRAM_MS + (np.inf,)
+        counts = np.histogram(samples, bins=(0,) + edges)[0]
+        return {
+            "count": total,
+            "mean_ms": float(samples.mean()),
+            "p50_ms": float(np.percentile(samples, 50)),
+            "p95_ms": float(np.percentile(samples, 95)),
+            "max_ms": float(samples.max()),
+            "per_second": self.rate(name),
+            "histogram": {f"<{edge:g}ms" if edge != np.inf else f">={edges[-2]:g}ms": int(count)
+                          for edge, count in zip(edges, counts)},
+        }
+
+    def stats(self):
+        with self.lock:
+            names = sorted(self.samples)
+            counters = dict(self.counters)
+        return {"stages": {name: self.stage_stats(name) for name in names}, "counters": counters}
+
+    def dump(self, file_path, extra=None):
+        """
+        Write the current statistics, plus any extra sections, as JSON.
+        """
+        trace = {"started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+                 "saved": time.strftime("%Y-%m-%dT%H:%M:%S"), **self.stats(), **(extra or {})}
+        with open(file_path, "w") as trace_file:
+            json.dump(trace, trace_file, indent=2, default=str)
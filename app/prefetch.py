@@ -0,0 +1,49 @@
+import os
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SlicePrefetcher:
+    """
+    Render upcoming slices on a thread pool so the GUI thread only swaps in finished images.
+    - prefetch() takes (key, job) pairs; each job renders one slice and stores it in the cache.
+    - Queued jobs that are not part of the latest request are cancelled as stale.
+    """
+
+    def __init__(self, workers=None, depth=8):
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.depth = depth
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="slice-prefetch")
+        self.futures = {}
+        self.lock = threading.Lock()
+
+    def prefetch(self, jobs):
+        jobs = list(jobs)
+        wanted = {key for key, _ in jobs}
+        with self.lock:
+            for key, future in list(self.futures.items()):
+                if key not in wanted and future.cancel():
+                    del self.futures[key]
+            for key, job in jobs:
+                if key not in self.futures:
+                    self.futures[key] = self.executor.submit(self.run, key, job)
+
+    def run(self, key, job):
+        try:
+            job()
+        except Exception:
+            logging.exception("Prefetch of %s failed", key)
+        finally:
+            with self.lock:
+                self.futures.pop(key, None)
+
+    def cancel(self):
+        with self.lock:
+            for key, future in list(self.futures.items()):
+                if future.cancel():
+                    del self.futures[key]
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
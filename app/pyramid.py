@@ -0,0 +1,89 @@
+import threading
+import logging
+
+import numpy as np
+
+
+def downsample(volume, chunk=16):
+    """
+    Halve a (z, y, x) volume along every axis by averaging 2x2x2 blocks. Odd trailing
+    planes are dropped. Works in chunks of output planes to bound temporary memory.
+    """
+    depth, height, width = (size // 2 for size in volume.shape)
+    result = np.empty((depth, height, width), dtype=volume.dtype)
+    for start in range(0, depth, chunk):
+        stop = min(start + chunk, depth)
+        block = np.asarray(volume[2 * start:2 * stop, :2 * height, :2 * width], dtype=np.float32)
+        block = block.reshape(stop - start, 2, height, 2, width, 2).mean(axis=(1, 3, 5))
+        if result.dtype.kind in "iu":
+            np.rint(block, out=block)
+        result[start:stop] = block
+    return result
+
+
+class ImagePyramid:
+    """
+    Multi-resolution copies of a volume, each level half the size of the previous one.
+    - Level 0 is the volume itself; coarser levels are built on a background thread.
+    - Levels stop once the largest dimension would drop below min_dimension or the
+      levels would exceed max_bytes.
+    - level_for() picks the coarsest level that still gives at least one voxel per screen pixel.
+    """
+    AXIS = {"axial": 0, "sagittal": 2, "coronal": 1}
+
+    def __init__(self, min_dimension=128, max_bytes=1024 ** 3, on_ready=None):
+        self.min_dimension = min_dimension
+        self.max_bytes = max_bytes
+        self.on_ready = on_ready
+        self.volume = None
+        self.levels = []
+        self.generation = 0
+
+    def set_volume(self, volume):
+        self.generation += 1
+        self.volume = volume
+        self.levels = [] if volume is None else [volume]
+        if volume is not None and max(volume.shape) // 2 >= self.min_dimension:
+            threading.Thread(target=self.build, args=(volume, self.generation), daemon=True).start()
+
+    def build(self, volume, generation):
+        budget = self.max_bytes
+        level = volume
+        while min(level.shape) >= 2 and max(level.shape) // 2 >= self.min_dimension:
+            if level.nbytes // 8 > budget or generation != self.generation:
+                break
+            level = downsample(level)
+            if generation != self.generation:
+                return
+            budget -= level.nbytes
+            self.levels = self.levels + [level]
+            logging.debug("Pyramid level %d ready: %s", len(self.levels) - 1, level.shape)
+        if self.on_ready is not None and len(self.levels) > 1:
+            self.on_ready()
+
+    def level_for(self, scale):
+        """
+        scale is screen pixels per full-resolution voxel.
+        """
+        level = 0
+        while level + 1 < len(self.levels) and scale * 2 ** (level + 1) <= 1:
+            level += 1
+        return level
+
+    def level_volume(self, volume, level):
+        levels = self.levels if volume is self.volume else [volume]
+        level = min(level, len(levels) - 1)
+        return levels[level], level
+
+    def slice_shape(self, view, level):
+        depth, height, width = self.levels[level].shape
+        return {"axial": (height, width), "sagittal": (depth, height), "coronal": (depth, width)}[view]
+
+    def extract(self, view, index, volume, level):
+        data, level = self.level_volume(volume, level)
+        index = min(index >> level, data.shape[self.AXIS[view]] - 1)
+        if view == "axial":
+            return data[index, :, :]
+        elif view == "sagittal":
+            return data[:, :, index]
+        return data[:, index, :]
@@ -0,0 +1,51 @@
+import time
+
+from PyQt6.QtCore import QObject, QTimer
+
+
+class RenderScheduler(QObject):
+    """
+    Coalesce repaint requests so each dirty view is rendered at most once per flush.
+    - Requests made during one event-loop turn are flushed together on the next turn.
+    - Flushes are spaced at least 1 / max_fps seconds apart (0 disables the cap).
+    - on_flushed, if set, is called with the rendered views after each flush.
+    """
+
+    def __init__(self, render_view, max_fps=60, parent=None):
+        super().__init__(parent)
+        self.render_view = render_view
+        self.dirty = []
+        self.last_flush = 0.0
+        self.min_interval = 0.0
+        self.on_flushed = None
+        self.set_max_fps(max_fps)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+
+    def set_max_fps(self, max_fps):
+        self.max_fps = max_fps
+        self.min_interval = 1.0 / max_fps if max_fps and max_fps > 0 else 0.0
+
+    def request(self, *views):
+        for view in views:
+            if view not in self.dirty:
+                self.dirty.append(view)
+
+        if self.dirty and not self.timer.isActive():
+            wait = self.min_interval - (time.perf_counter() - self.last_flush)
+            self.timer.start(max(0, int(wait * 1000)))
+
+    def cancel(self):
+        self.timer.stop()
+        self.dirty = []
+
+    def flush(self):
+        self.timer.stop()
+        views, self.dirty = self.dirty, []
+        self.last_flush = time.perf_counter()
+        for view in views:
+            self.render_view(view)
+        if self.on_flushed is not None and views:
+            self.on_flushed(views)
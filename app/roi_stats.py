@@ -0,0 +1,193 @@
+import math
+import threading
+import time
+import logging
+
+import numpy as np
+
+
+class IntegralVolume:
+    """
+    Mean, standard deviation, minimum and maximum of axis-aligned boxes of a (z, y, x) volume,
+    from indexes built in one chunked pass on a background thread.
+    - Every axial slice gets summed-area tables of its values and of their squares, padded
+      with a leading zero row and column, so a box's sum and sum of squares take four
+      corner reads per slice it spans. Values are offset by the middle of the value range
+      first to keep the sums small.
+    - 8/16-bit integer data is summed exactly in the narrowest integer type that holds a
+      whole slice's sum: int32 sums for 8/12-bit data on slices up to 512x512, int64
+      squares. Other data is summed in float64. For 12-bit data the tables take 12 bytes
+      per voxel.
+    - Minima and maxima of BLOCK^3 blocks answer the whole blocks inside a box; only the
+      thin border outside them is read from the volume.
+    - The indexes are only built while they fit in max_bytes. Until they are ready, for
+      other volumes, or when they do not fit, boxes are read from the volume directly.
+    - Boxes are ((z0, z1), (y0, y1), (x0, x1)) half-open ranges of stored voxels.
+    """
+    BLOCK = 8
+
+    def __init__(self, max_bytes=2 * 1024 ** 3, chunk=16, on_ready=None):
+        self.max_bytes = max_bytes
+        self.chunk = chunk
+        self.on_ready = on_ready
+        self.volume = None
+        self.generation = 0
+        self.index = None
+        self.skipped = False
+
+    @property
+    def ready(self):
+        return self.index is not None
+
+    @staticmethod
+    def accumulator(dtype):
+        return np.int64 if dtype.kind in "iu" and dtype.itemsize <= 2 else np.float64
+
+    @staticmethod
+    def table_types(dtype, reach, slice_size):
+        """
+        Types of the sum and square tables, given the largest offset value magnitude. Integer
+        tables must hold a whole slice's total exactly.
+        """
+        if dtype.kind not in "iu" or dtype.itemsize > 2:
+            return np.float64, np.float64
+        return tuple(np.int32 if slice_size * bound <= np.iinfo(np.int32).max else np.int64
+                     for bound in (reach, reach * reach))
+
+    def set_volume(self, volume, value_range=None):
+        self.generation += 1
+        self.volume = volume
+        self.index = None
+        self.skipped = False
+        if volume is not None:
+            threading.Thread(target=self.build, args=(volume, value_range, self.generation), daemon=True).start()
+
+    def exact_range(self, volume, generation):
+        low, high = math.inf, -math.inf
+        for start in range(0, volume.shape[0], self.chunk):
+            if generation != self.generation:
+                return None
+            block = np.asarray(volume[start:start + self.chunk])
+            low, high = min(low, block.min().item()), max(high, block.max().item())
+        return low, high
+
+    def build(self, volume, value_range, generation):
+        start_time = time.perf_counter()
+        integer = self.accumulator(volume.dtype) is np.int64
+        if integer or value_range is None:
+            # Integer tables are sized from the exact range; the loader's may be an estimate
+            value_range = self.exact_range(volume, generation)
+            if value_range is None:
+                return
+        low, high = value_range
+        shift = int(low + high) // 2 if integer else (low + high) / 2
+        types = self.table_types(volume.dtype, max(high - shift, shift - low), volume.shape[1] * volume.shape[2])
+        cells = volume.shape[0] * (volume.shape[1] + 1) * (volume.shape[2] + 1)
+        nbytes = cells * sum(np.dtype(table_type).itemsize for table_type in types)
+        if nbytes > self.max_bytes:
+            self.skipped = True
+            logging.warning("No ROI index: it needs %d MB, over the %d MB limit; ROI statistics read the volume "
+                            "instead", nbytes // 1024 ** 2, self.max_bytes // 1024 ** 2)
+            return
+
+        shape = (volume.shape[0], volume.shape[1] + 1, volume.shape[2] + 1)
+        sums = np.zeros(shape, dtype=types[0])
+        squares = np.zeros(shape, dtype=types[1])
+        block_shape = tuple(-(-size // self.BLOCK) for size in volume.shape)
+        block_min = np.empty(block_shape, dtype=volume.dtype)
+        block_max = np.empty(block_shape, dtype=volume.dtype)
+        rows, columns = range(0, volume.shape[1], self.BLOCK), range(0, volume.shape[2], self.BLOCK)
+
+        # Chunks are whole blocks deep, so each block's extremes come from one chunk
+        chunk = -(-self.chunk // self.BLOCK) * self.BLOCK
+        for start in range(0, volume.shape[0], chunk):
+            if generation != self.generation:
+                return
+            block = np.asarray(volume[start:start + chunk])
+            depth = range(0, len(block), self.BLOCK)
+            for reduce, target in ((np.minimum.reduceat, block_min), (np.maximum.reduceat, block_max)):
+                target[start // self.BLOCK:(start + len(block) - 1) // self.BLOCK + 1] = \
+                    reduce(reduce(reduce(block, depth, axis=0), rows, axis=1), columns, axis=2)
+
+            values = np.subtract(block, shift, dtype=sums.dtype)
+            for table, data in ((sums, values), (squares, np.multiply(values, values, dtype=squares.dtype))):
+                target = table[start:start + len(block), 1:, 1:]
+                np.cumsum(data, axis=2, out=target)
+                np.cumsum(target, axis=1, out=target)
+
+        if generation != self.generation:
+            return
+        self.index = {"sums": sums, "squares": squares, "min": block_min, "max": block_max, "shift": shift,
+                      "seconds": time.perf_counter() - start_time}
+        logging.debug("ROI index ready in %.2f s", self.index["seconds"])
+        if self.on_ready is not None:
+            self.on_ready()
+
+    @staticmethod
+    def box_sum(table, box):
+        (z0, z1), (y0, y1), (x0, x1) = box
+        # Slices are added up in 64 bits, which the 32-bit tables' totals cannot overflow
+        total = np.int64 if table.dtype.kind == "i" else np.float64
+        slab = table[z0:z1]
+        return (np.sum(slab[:, y1, x1], dtype=total) - np.sum(slab[:, y0, x1], dtype=total)
+                - np.sum(slab[:, y1, x0], dtype=total) + np.sum(slab[:, y0, x0], dtype=total))
+
+    def extremes(self, box, volume):
+        """
+        (min, max) of a box: whole blocks from the block index, the border around them from the volume.
+        """
+        inner = [(-(-low // self.BLOCK), high // self.BLOCK) for low, high in box]
+        if any(first >= last for first, last in inner):
+            values = volume[tuple(slice(low, high) for low, high in box)]
+            return values.min(), values.max()
+        index = tuple(slice(first, last) for first, last in inner)
+        low, high = self.index["min"][index].min(), self.index["max"][index].max()
+        # Peel off the border one axis at a time: below and above the inner blocks on that
+        # axis, across the part of the box not yet covered on the later axes
+        ranges = [slice(low, high) for low, high in box]
+        for axis, ((box_low, box_high), (first, last)) in enumerate(zip(box, inner)):
+            for start, stop in ((box_low, first * self.BLOCK), (last * self.BLOCK, box_high)):
+                if start < stop:
+                    part = list(ranges)
+                    part[axis] = slice(start, stop)
+                    values = volume[tuple(part)]
+                    low, high = min(low, values.min()), max(high, values.max())
+            ranges[axis] = slice(first * self.BLOCK, last * self.BLOCK)
+        return low, high
+
+    def box_stats(self, box, volume):
+        """
+        count, mean, std, min and max of the stored values in a box.
+        """
+        count = math.prod(high - low for low, high in box)
+        if count <= 0:
+            return None
+        accumulator = self.accumulator(volume.dtype)
+        if self.index is not None and volume is self.volume:
+            shift = self.index["shift"]
+            total = self.box_sum(self.index["sums"], box)
+            total_squares = self.box_sum(self.index["squares"], box)
+            low, high = self.extremes(box, volume)
+        else:
+            values = volume[tuple(slice(low, high) for low, high in box)]
+            shift = 0
+            total = np.sum(values, dtype=accumulator)
+            total_squares = np.sum(np.square(values, dtype=accumulator))
+            low, high = values.min(), values.max()
+        if accumulator is np.int64:
+            # Exact in Python integers; only the final division rounds
+            total, total_squares = int(total), int(total_squares)
+            variance = (count * total_squares - total * total) / (count * count)
+        else:
+            variance = total_squares / count - (total / count) ** 2
+        return {"count": count, "mean": total / count + shift, "std": math.sqrt(max(variance, 0.0)),
+                "min": float(low), "max": float(high)}
+
+    def memory_bytes(self):
+        if self.index is None:
+            return 0
+        return sum(self.index[name].nbytes for name in ("sums", "squares", "min", "max"))
+
+    def stats(self):
+        return {"ready": self.ready, "skipped": self.skipped, "memory_bytes": self.memory_bytes(),
+                "max_bytes": self.max_bytes, "seconds": self.index["seconds"] if self.index is not None else None}
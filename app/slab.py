@@ -0,0 +1,141 @@
+import math
+import time
+import threading
+from collections import OrderedDict, deque
+
+import numpy as np
+
+
+class SlabProjector:
+    """
+    Thick-slab maximum, minimum and average intensity projections along a view's slice axis.
+    - A slab of thickness slices is centred on the current slice and clipped to the volume.
+    - Maxima and minima are combined from cached reductions of fixed blocks of slices plus
+      the partial blocks at either end, so a slab costs about 2 * block + thickness / block
+      slice reads instead of thickness.
+    - The average keeps a running sum per view; stepping the slab adds the slices that enter
+      and subtracts those that leave. Float sums are rebuilt every max_updates steps to
+      bound rounding drift.
+    - Projections keep the volume's dtype (averages of integer data are rounded), so they
+      window, cache and export like ordinary slices.
+    - Slices are read through read_block(view, start, stop, volume), which returns them
+      stacked along axis 0. Blocks and sums are only kept for the volume given to set_volume.
+    """
+    MODES = ("mip", "minip", "average")
+    REDUCE = {"mip": np.maximum, "minip": np.minimum}
+
+    def __init__(self, read_block, max_bytes=256 * 1024 * 1024, max_updates=256):
+        self.read_block = read_block
+        self.max_bytes = max_bytes
+        self.max_updates = max_updates
+        self.volume = None
+        self.blocks = OrderedDict()
+        self.block_bytes = 0
+        self.sums = {}
+        self.hits = 0
+        self.misses = 0
+        self.timings = deque(maxlen=64)
+        self.lock = threading.Lock()
+
+    def set_volume(self, volume):
+        with self.lock:
+            self.volume = volume
+            self.blocks.clear()
+            self.block_bytes = 0
+            self.sums = {}
+
+    @staticmethod
+    def slab_range(index, thickness, count):
+        start = index - thickness // 2
+        return max(0, start), min(count, start + thickness)
+
+    @staticmethod
+    def block_size(thickness):
+        return max(2, round(math.sqrt(thickness)))
+
+    def project(self, view, index, thickness, mode, volume):
+        """
+        Slab projection around slice index of a view, laid out like that view's slices.
+        """
+        start_time = time.perf_counter()
+        count = volume.shape[{"axial": 0, "sagittal": 2, "coronal": 1}[view]]
+        start, stop = self.slab_range(index, thickness, count)
+        with self.lock:
+            if mode == "average":
+                image = self.average(view, start, stop, volume)
+            else:
+                image = self.extreme(view, start, stop, mode, volume, self.block_size(thickness))
+        self.timings.append(time.perf_counter() - start_time)
+        return image
+
+    def reduce(self, view, start, stop, mode, volume):
+        return self.REDUCE[mode].reduce(self.read_block(view, start, stop, volume), axis=0)
+
+    def block(self, view, number, size, mode, volume):
+        key = (view, mode, size, number)
+        image = self.blocks.get(key)
+        if image is not None:
+            self.blocks.move_to_end(key)
+            self.hits += 1
+            return image
+        self.misses += 1
+        count = volume.shape[{"axial": 0, "sagittal": 2, "coronal": 1}[view]]
+        image = self.reduce(view, number * size, min(count, (number + 1) * size), mode, volume)
+        self.blocks[key] = image
+        self.block_bytes += image.nbytes
+        while self.block_bytes > self.max_bytes and self.blocks:
+            self.block_bytes -= self.blocks.popitem(last=False)[1].nbytes
+        return image
+
+    def extreme(self, view, start, stop, mode, volume, size):
+        first, last = -(-start // size), stop // size  # Whole blocks inside the slab
+        if volume is not self.volume or first >= last:
+            return self.reduce(view, start, stop, mode, volume)
+        parts = [self.block(view, number, size, mode, volume) for number in range(first, last)]
+        if start < first * size:
+            parts.append(self.reduce(view, start, first * size, mode, volume))
+        if last * size < stop:
+            parts.append(self.reduce(view, last * size, stop, mode, volume))
+        image = parts[0].copy()
+        for part in parts[1:]:
+            self.REDUCE[mode](image, part, out=image)
+        return image
+
+    def average(self, view, start, stop, volume):
+        accumulator = np.int64 if volume.dtype.kind in "iu" else np.float64
+
+        def add(total, first, last, sign):
+            if first < last:
+                part = np.sum(self.read_block(view, first, last, volume), axis=0, dtype=accumulator)
+                if sign > 0:
+                    total += part
+                else:
+                    total -= part
+
+        state = self.sums.get(view) if volume is self.volume else None
+        if (state is not None and state["updates"] < self.max_updates
+                and abs(start - state["start"]) + abs(stop - state["stop"]) < stop - start):
+            total = state["sum"]
+            add(total, state["start"], start, -1)
+            add(total, start, state["start"], 1)
+            add(total, state["stop"], stop, 1)
+            add(total, stop, state["stop"], -1)
+            updates = state["updates"] + (accumulator is np.float64)
+        else:
+            total = np.sum(self.read_block(view, start, stop, volume), axis=0, dtype=accumulator)
+            updates = 0
+        if volume is self.volume:
+            self.sums[view] = {"start": start, "stop": stop, "sum": total, "updates": updates}
+
+        mean = total / (stop - start)
+        if volume.dtype.kind in "iu":
+            np.rint(mean, out=mean)
+        return mean.astype(volume.dtype)
+
+    def memory_bytes(self):
+        return self.block_bytes + sum(state["sum"].nbytes for state in self.sums.values())
+
+    def stats(self):
+        return {"blocks": len(self.blocks), "memory_bytes": self.memory_bytes(), "hits": self.hits,
+                "misses": self.misses,
+                "mean_ms": 1000 * sum(self.timings) / len(self.timings) if self.timings else 0.0}
@@ -0,0 +1,69 @@
+import threading
+from collections import OrderedDict
+
+
+class SliceCache:
+    """
+    Least-recently-used cache of rendered slice images, bounded by total size in bytes.
+    - Keys are tuples describing everything the rendered image depends on.
+    - Hit, miss and eviction counters are kept for tuning the memory limit.
+    - All operations are guarded by a lock so prefetch workers can fill the cache.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, nbytes):
+        with self.lock:
+            if key in self.entries:
+                self.current_bytes -= self.entries.pop(key)[1]
+            if nbytes > self.max_bytes:
+                return
+            self.entries[key] = (value, nbytes)
+            self.current_bytes += nbytes
+            self.evict()
+
+    def evict(self):
+        while self.current_bytes > self.max_bytes and self.entries:
+            _, (_, nbytes) = self.entries.popitem(last=False)
+            self.current_bytes -= nbytes
+            self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,126 @@
+import numpy as np
+import vtk
+from vtkmodules.util.numpy_support import numpy_to_vtk
+
+
+class SlicePlanes3D:
+    """
+    The current axial, sagittal and coronal slices shown as textured planes in the 3D scene.
+    - Planes are placed in the same world coordinates as VolumePipeline3D, so the two
+      modes share one camera.
+    - Each plane holds one windowed 8-bit slice. Moving a plane only replaces that slice's
+      pixels and origin; the volume itself is never uploaded.
+    - Slices may come from a pyramid level; the plane spacing is stretched to the full extent.
+    - An oblique axial slice is placed by a transform from its plane coordinates.
+    - An outline of the volume bounds keeps the planes in context.
+    """
+    AXIS = {"axial": 0, "sagittal": 2, "coronal": 1}
+
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.shape = None
+        self.spacing = (1.0, 1.0, 1.0)
+        self.visible = False
+        self.images = {}
+        self.arrays = {}
+        self.actors = {}
+        for view in self.AXIS:
+            image = vtk.vtkImageData()
+            actor = vtk.vtkImageActor()
+            actor.GetMapper().SetInputData(image)
+            # Pixels are already windowed, so the property passes them through unchanged
+            actor.GetProperty().SetColorWindow(255.0)
+            actor.GetProperty().SetColorLevel(127.5)
+            actor.InterpolateOn()
+            self.images[view] = image
+            self.actors[view] = actor
+
+        self.outline = vtk.vtkOutlineSource()
+        outline_mapper = vtk.vtkPolyDataMapper()
+        outline_mapper.SetInputConnection(self.outline.GetOutputPort())
+        self.outline_actor = vtk.vtkActor()
+        self.outline_actor.SetMapper(outline_mapper)
+        self.outline_actor.GetProperty().SetColor(1.0, 1.0, 0.0)
+
+    def props(self):
+        return list(self.actors.values()) + [self.outline_actor]
+
+    def set_volume(self, shape, spacing=(1.0, 1.0, 1.0)):
+        """
+        shape and spacing are (z, y, x). Returns True when the planes were added to the scene.
+        """
+        self.shape = shape
+        self.spacing = spacing
+        depth, height, width = shape
+        self.outline.SetBounds(0.0, (width - 1) * spacing[2], 0.0, (height - 1) * spacing[1],
+                               0.0, (depth - 1) * spacing[0])
+        self.arrays = {}
+        added = False
+        for prop in self.props():
+            if not self.renderer.HasViewProp(prop):
+                self.renderer.AddViewProp(prop)
+                added = True
+        self.set_visible(self.visible)
+        return added
+
+    def set_visible(self, visible):
+        self.visible = visible
+        for prop in self.props():
+            # Planes without a slice yet stay hidden
+            prop.SetVisibility(visible and (prop is self.outline_actor or self.has_slice(prop)))
+
+    def has_slice(self, actor):
+        return any(actor is self.actors[view] and view in self.arrays for view in self.AXIS)
+
+    def set_slice(self, view, index, image, transform=None):
+        """
+        image is the windowed uint8 slice of the volume at index, as read (before the
+        display flip), possibly from a coarser pyramid level. transform, if given, is a 4x4
+        matrix taking the slice's (column, row) position in millimetres to world coordinates.
+        """
+        if self.shape is None:
+            return
+        rows, columns = image.shape
+        depth, height, width = self.shape
+        spacing_z, spacing_y, spacing_x = self.spacing
+
+        def stretch(size, full_size, spacing):
+            return spacing * (full_size - 1) / (size - 1) if size > 1 else spacing
+
+        if view == "axial":
+            dimensions = (columns, rows, 1)
+            spacing = (stretch(columns, width, spacing_x), stretch(rows, height, spacing_y), 1.0)
+            origin = (0.0, 0.0, index * spacing_z) if transform is None else (0.0, 0.0, 0.0)
+        elif view == "sagittal":
+            dimensions = (1, columns, rows)
+            spacing = (1.0, stretch(columns, height, spacing_y), stretch(rows, depth, spacing_z))
+            origin = (index * spacing_x, 0.0, 0.0)
+        else:
+            dimensions = (columns, 1, rows)
+            spacing = (stretch(columns, width, spacing_x), 1.0, stretch(rows, depth, spacing_z))
+            origin = (0.0, index * spacing_y, 0.0)
+
+        # VTK keeps a pointer to the array, so it stays referenced until the next slice
+        self.arrays[view] = np.ascontiguousarray(image, dtype=np.uint8).reshape(-1)
+        vtk_image = self.images[view]
+        vtk_image.SetDimensions(*dimensions)
+        vtk_image.SetSpacing(*spacing)
+        vtk_image.SetOrigin(*origin)
+        vtk_image.GetPointData().SetScalars(numpy_to_vtk(self.arrays[view], deep=False))
+        vtk_image.Modified()
+        if transform is not None:
+            matrix = vtk.vtkMatrix4x4()
+            matrix.DeepCopy(tuple(transform.ravel()))
+            self.actors[view].SetUserMatrix(matrix)
+        else:
+            self.actors[view].SetUserMatrix(None)
+        self.actors[view].SetDisplayExtent(vtk_image.GetExtent())
+        self.actors[view].SetVisibility(self.visible)
+
+    def clear(self):
+        for prop in self.props():
+            self.renderer.RemoveViewProp(prop)
+        for image in self.images.values():
+            image.GetPointData().SetScalars(None)
+        self.arrays = {}
+        self.shape = None
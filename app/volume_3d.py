@@ -0,0 +1,258 @@
+import os
+import logging
+from collections import deque
+
+import numpy as np
+import vtk
+from vtkmodules.util.numpy_support import numpy_to_vtk
+from PyQt6.QtCore import QTimer
+
+
+class VolumePipeline3D:
+    """
+    Persistent volume-rendering scene for the 3D view.
+    - The numpy volume is imported into VTK without copying, in its native scalar type.
+    - Transfer functions are laid out over the volume's real intensity range, so 16-bit
+      data is mapped rather than wrapped into 8 bits.
+    - The mapper, property and actor are built once; set_volume() on later loads or
+      rotations only swaps the image data and transfer function points.
+    - backend is "gpu", "cpu" (multi-threaded fixed-point ray casting) or "auto". "auto"
+      is decided once the render window is initialized, after its first render with the
+      CPU mapper: software OpenGL renderers such as llvmpipe count as no GPU, as does a
+      window where GPU ray casting is not supported. The mapper is created with the first
+      volume.
+    - If VTK reports an error while the GPU mapper is active (for example a volume larger
+      than the GPU's 3D textures), rendering switches to the CPU mapper for this volume and
+      later ones until a backend is chosen again.
+    - While the user rotates the view, the CPU mapper renders with coarser sample and
+      image distances, then re-renders at full quality after idle_ms without interaction.
+    """
+    BACKENDS = ("auto", "gpu", "cpu")
+    SOFTWARE_RENDERERS = ("llvmpipe", "softpipe", "swiftshader", "microsoft basic render", "software rasterizer")
+    INTERACTIVE_SAMPLE_FACTOR = 4.0
+    INTERACTIVE_IMAGE_SAMPLE_DISTANCE = 2.0
+    # (fraction of the intensity range, value) pairs of the original 8-bit transfer functions
+    OPACITY_POINTS = [(0.0, 0.0), (80.0 / 255.0, 0.1), (1.0, 0.2)]
+    COLOR_POINTS = [(0.0, (0.0, 0.0, 0.0)), (0.25, (1.0, 0.0, 0.0)), (0.5, (0.0, 0.0, 1.0)),
+                    (0.75, (0.0, 1.0, 0.0)), (1.0, (1.0, 1.0, 1.0))]
+
+    def __init__(self, render_window, renderer, backend="auto", idle_ms=300):
+        self.render_window = render_window
+        self.renderer = renderer
+        self.array = None
+        self.interacting = False
+        self.base_sample_distance = 1.0
+        self.frame_times = deque(maxlen=32)
+        self.on_frame = None
+
+        self.image = vtk.vtkImageData()
+        self.mapper = None
+        self.active_backend = None
+        self.gpu_failed = False
+        self.auto_pending = False
+        self.error_observer = None
+
+        self.opacity = vtk.vtkPiecewiseFunction()
+        self.color = vtk.vtkColorTransferFunction()
+        self.property = vtk.vtkVolumeProperty()
+        self.property.ShadeOn()
+        self.property.SetInterpolationTypeToLinear()
+        self.property.SetScalarOpacity(self.opacity)
+        self.property.SetColor(self.color)
+
+        self.volume = vtk.vtkVolume()
+        self.volume.SetProperty(self.property)
+        self.set_backend(backend)
+
+        self.idle_timer = QTimer()
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.setInterval(idle_ms)
+        self.idle_timer.timeout.connect(self.end_interaction)
+        self.renderer.AddObserver("EndEvent", self.record_frame_time)
+        self.render_window.AddObserver("EndEvent", self.on_window_rendered)
+
+    def set_backend(self, backend):
+        self.backend = backend
+        self.mapper = None
+        self.active_backend = None
+        self.gpu_failed = False
+        self.interacting = False
+        if self.array is not None:
+            self.create_mapper()
+            self.render()
+
+    def create_mapper(self, use_gpu=None):
+        backend = self.backend
+        # Querying an uninitialized (Qt) render window breaks its context, so "auto" waits for the first render
+        self.auto_pending = backend == "auto" and use_gpu is None and not self.render_window.GetInitialized()
+        if use_gpu is None:
+            use_gpu = not self.gpu_failed and (backend == "gpu" or (backend == "auto" and not self.auto_pending
+                                                                    and self.gpu_supported()))
+        self.active_backend = "gpu" if use_gpu else "cpu"
+        self.watch_gpu_errors(use_gpu)
+        if use_gpu:
+            self.mapper = vtk.vtkGPUVolumeRayCastMapper()
+        else:
+            self.mapper = vtk.vtkFixedPointVolumeRayCastMapper()
+            self.mapper.SetNumberOfThreads(os.cpu_count() or 1)
+            self.mapper.AutoAdjustSampleDistancesOff()
+            self.mapper.SetSampleDistance(self.base_sample_distance)
+        self.mapper.SetInputData(self.image)
+        self.volume.SetMapper(self.mapper)
+        logging.debug("3D rendering backend: %s (requested %s)", self.active_backend, backend)
+
+    def on_window_rendered(self, *args):
+        if self.auto_pending and self.render_window.GetInitialized():
+            self.auto_pending = False
+            # Not from inside the render
+            QTimer.singleShot(0, self.choose_auto_backend)
+
+    def choose_auto_backend(self):
+        if self.backend == "auto" and self.active_backend == "cpu" and not self.gpu_failed and self.gpu_supported():
+            self.interacting = False
+            self.create_mapper(use_gpu=True)
+            self.render()
+
+    def renderer_name(self):
+        """
+        The OpenGL renderer string of the initialized render window.
+        """
+        for line in self.render_window.ReportCapabilities().splitlines():
+            if line.strip().lower().startswith("opengl renderer string"):
+                return line.split(":", 1)[1].strip()
+        return ""
+
+    def gpu_supported(self):
+        try:
+            renderer = self.renderer_name()
+            if not renderer or any(name in renderer.lower() for name in self.SOFTWARE_RENDERERS):
+                logging.debug("No hardware GPU for volume rendering (renderer %r)", renderer)
+                return False
+            return bool(vtk.vtkGPUVolumeRayCastMapper().IsRenderSupported(self.render_window, self.property))
+        except Exception:
+            logging.exception("GPU volume rendering check failed")
+            return False
+
+    def watch_gpu_errors(self, watch):
+        # VTK errors from the GPU mapper's internals (textures, shaders) only reach the output window
+        if self.error_observer is None and not watch:
+            return
+        output = vtk.vtkOutputWindow.GetInstance()
+        if self.error_observer is not None:
+            output.RemoveObserver(self.error_observer)
+            self.error_observer = None
+        if watch:
+            self.error_observer = output.AddObserver("ErrorEvent", self.on_gpu_error)
+
+    def on_gpu_error(self, *args):
+        if self.active_backend == "gpu" and not self.gpu_failed:
+            self.gpu_failed = True
+            # Not from inside the failing render
+            QTimer.singleShot(0, self.fall_back_to_cpu)
+
+    def fall_back_to_cpu(self):
+        if self.active_backend != "gpu":
+            return
+        logging.warning("GPU volume rendering failed; using CPU ray casting")
+        self.interacting = False
+        self.create_mapper()
+        self.render()
+
+    def attach_interactor(self, interactor):
+        # A higher priority than the interactor style so quality drops before its render
+        for event in ("LeftButtonPressEvent", "MiddleButtonPressEvent", "RightButtonPressEvent"):
+            interactor.AddObserver(event, self.start_interaction, 1.0)
+        for event in ("LeftButtonReleaseEvent", "MiddleButtonReleaseEvent", "RightButtonReleaseEvent"):
+            interactor.AddObserver(event, self.schedule_full_quality, 1.0)
+        for event in ("MouseWheelForwardEvent", "MouseWheelBackwardEvent"):
+            interactor.AddObserver(event, self.start_interaction, 1.0)
+            interactor.AddObserver(event, self.schedule_full_quality, 1.0)
+
+    def start_interaction(self, *args):
+        self.idle_timer.stop()
+        if self.interacting or self.active_backend != "cpu" or not self.volume.GetVisibility():
+            return
+        self.interacting = True
+        self.mapper.SetSampleDistance(self.base_sample_distance * self.INTERACTIVE_SAMPLE_FACTOR)
+        self.mapper.SetImageSampleDistance(self.INTERACTIVE_IMAGE_SAMPLE_DISTANCE)
+
+    def schedule_full_quality(self, *args):
+        if self.interacting:
+            self.idle_timer.start()
+
+    def end_interaction(self):
+        if not self.interacting:
+            return
+        self.interacting = False
+        self.mapper.SetSampleDistance(self.base_sample_distance)
+        self.mapper.SetImageSampleDistance(1.0)
+        self.render()
+
+    def record_frame_time(self, *args):
+        self.frame_times.append(self.renderer.GetLastRenderTimeInSeconds())
+        if self.on_frame is not None:
+            self.on_frame()
+
+    def frame_time(self):
+        """
+        Mean time of the recent 3D renders, in seconds.
+        """
+        return sum(self.frame_times) / len(self.frame_times) if self.frame_times else 0.0
+
+    def set_volume(self, volume, value_range, spacing=(1.0, 1.0, 1.0), reset_camera=True):
+        """
+        volume is (z, y, x); value_range is (min, max) of the stored values and spacing is (z, y, x).
+        """
+        array = volume if volume.dtype.isnative else volume.astype(volume.dtype.newbyteorder("="))
+        # Only non-contiguous views (for example after a rotation) need a copy
+        self.array = np.ascontiguousarray(array).reshape(-1)
+
+        depth, height, width = volume.shape
+        self.image.SetDimensions(width, height, depth)
+        self.image.SetSpacing(spacing[2], spacing[1], spacing[0])
+        # Half a voxel along the finest axis, as the GPU mapper does by default
+        self.base_sample_distance = min(spacing) / 2
+        if self.mapper is None:
+            self.create_mapper()
+        elif self.active_backend == "cpu" and not self.interacting:
+            self.mapper.SetSampleDistance(self.base_sample_distance)
+        self.image.GetPointData().SetScalars(numpy_to_vtk(self.array, deep=False))
+        self.image.Modified()
+        self.set_transfer_functions(*value_range)
+
+        if not self.renderer.HasViewProp(self.volume):
+            self.renderer.AddVolume(self.volume)
+            reset_camera = True
+        if reset_camera:
+            self.renderer.ResetCamera()
+        self.render()
+
+    def set_orientation(self, matrix):
+        """
+        4x4 matrix placing the volume in displayed coordinates, so turning the 2D views turns
+        the 3D view without uploading the volume again.
+        """
+        user_matrix = vtk.vtkMatrix4x4()
+        user_matrix.DeepCopy(tuple(matrix.ravel()))
+        self.volume.SetUserMatrix(user_matrix)
+
+    def set_visible(self, visible):
+        self.volume.SetVisibility(visible)
+
+    def set_transfer_functions(self, low, high):
+        span = (high - low) or 1.0
+        self.opacity.RemoveAllPoints()
+        for fraction, opacity in self.OPACITY_POINTS:
+            self.opacity.AddPoint(low + fraction * span, opacity)
+        self.color.RemoveAllPoints()
+        for fraction, (red, green, blue) in self.COLOR_POINTS:
+            self.color.AddRGBPoint(low + fraction * span, red, green, blue)
+
+    def clear(self):
+        self.renderer.RemoveVolume(self.volume)
+        self.image.GetPointData().SetScalars(None)
+        self.array = None
+        self.render()
+
+    def render(self):
+        self.render_window.Render()
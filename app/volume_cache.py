@@ -0,0 +1,219 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+
+import numpy as np
+
+
+def default_cache_dir():
+    return os.path.join(os.path.expanduser("~"), ".cache", "mpr_viewer", "volumes")
+
+
+def folder_fingerprint(folder_path):
+    """
+    Digest of a folder's path and the names, sizes and modification times of its .dcm files.
+    Only the directory entries are read, so it costs a stat per file rather than a header read.
+    """
+    digest = hashlib.sha1(os.path.abspath(folder_path).encode())
+    with os.scandir(folder_path) as entries:
+        files = sorted((entry.name, entry.stat()) for entry in entries
+                       if entry.name.lower().endswith(".dcm") and entry.is_file())
+    for name, stat in files:
+        digest.update(f"|{name}|{stat.st_size}|{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+class CachedSeries:
+    """
+    A series known from the cache index; stands in for a DicomSeries until its volume is mapped.
+    """
+
+    def __init__(self, folder_path, fingerprint, uid, description, count):
+        self.folder_path = folder_path
+        self.fingerprint = fingerprint
+        self.uid = uid
+        self.description = description
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+
+class VolumeCache:
+    """
+    Decoded DICOM volumes kept on disk and memory-mapped on reopen instead of decoded again.
+    - Each folder gets a directory named by folder_fingerprint(). Its index.json lists the
+      series found by the header scan; each decoded series is an .npy array plus a .json
+      file with its spacing and value range.
+    - A folder whose files were added, removed or rewritten gets a new fingerprint and misses.
+    - Decompressed .nii.gz voxels (see NiftiVolume) get a directory of their own, named by
+      the file's cache key, and share the budget below.
+    - Files are written under temporary "<name>.<pid>.part" names and renamed, the .json
+      last, so a reader only sees complete entries. Partial files left by a process that
+      died are removed by remove_stale_parts().
+    - The cache is kept under max_bytes by deleting the least recently used folders after
+      each store; a hit refreshes the folder's modification time. Folders still being
+      written are not evicted.
+    """
+    STALE_PART_SECONDS = 600
+
+    def __init__(self, cache_dir=None, max_bytes=4 * 1024 ** 3):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def folder_dir(self, fingerprint):
+        return os.path.join(self.cache_dir, fingerprint)
+
+    def entry_path(self, fingerprint, uid, extension):
+        name = hashlib.sha1(uid.encode()).hexdigest()[:16]
+        return os.path.join(self.folder_dir(fingerprint), name + extension)
+
+    def write_json(self, path, content):
+        partial_path = f"{path}.{os.getpid()}.part"
+        with open(partial_path, "w") as json_file:
+            json.dump(content, json_file)
+        os.replace(partial_path, path)
+
+    def store_index(self, fingerprint, folder_path, series_list):
+        os.makedirs(self.folder_dir(fingerprint), exist_ok=True)
+        self.write_json(os.path.join(self.folder_dir(fingerprint), "index.json"), {
+            "folder": os.path.abspath(folder_path),
+            "series": [{"uid": series.uid, "description": series.description, "count": len(series)}
+                       for series in series_list]})
+
+    def cached_series(self, folder_path, fingerprint):
+        """
+        The folder's series as CachedSeries when the index and every series volume are cached, else None.
+        """
+        try:
+            with open(os.path.join(self.folder_dir(fingerprint), "index.json")) as index_file:
+                index = json.load(index_file)
+        except (OSError, ValueError):
+            return None
+        series_list = [CachedSeries(folder_path, fingerprint, entry["uid"], entry["description"], entry["count"])
+                       for entry in index["series"]]
+        if not series_list or not all(self.contains(fingerprint, series.uid) for series in series_list):
+            return None
+        return series_list
+
+    def nifti_path(self, key):
+        return os.path.join(self.folder_dir(key), "voxels.raw")
+
+    def touch(self, fingerprint):
+        try:
+            os.utime(self.folder_dir(fingerprint))
+        except OSError:
+            pass
+
+    def contains(self, fingerprint, uid):
+        return os.path.exists(self.entry_path(fingerprint, uid, ".json"))
+
+    def load(self, fingerprint, uid):
+        """
+        Loader result for a cached series, with the volume memory-mapped read-only.
+        """
+        try:
+            with open(self.entry_path(fingerprint, uid, ".json")) as meta_file:
+                meta = json.load(meta_file)
+            volume = np.load(self.entry_path(fingerprint, uid, ".npy"), mmap_mode="r")
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.touch(fingerprint)
+        return {"volume": volume, "value_range": tuple(meta["value_range"]), "spacing": tuple(meta["spacing"])}
+
+    def store(self, fingerprint, uid, result):
+        """
+        Write a decoded series, then evict old folders. Runs on the calling thread.
+        """
+        start_time = time.perf_counter()
+        path = self.entry_path(fingerprint, uid, ".npy")
+        partial_path = f"{path}.{os.getpid()}.part"
+        try:
+            os.makedirs(self.folder_dir(fingerprint), exist_ok=True)
+            with open(partial_path, "wb") as volume_file:
+                np.save(volume_file, result["volume"])
+            os.replace(partial_path, path)
+            self.write_json(self.entry_path(fingerprint, uid, ".json"), {
+                "value_range": list(result["value_range"]), "spacing": list(result["spacing"]),
+                "shape": list(result["volume"].shape), "dtype": result["volume"].dtype.str})
+        except OSError:
+            logging.exception("Could not cache volume %s", uid)
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            return
+        logging.debug("Cached volume %s (%d bytes) in %.2f s", uid, result["volume"].nbytes,
+                      time.perf_counter() - start_time)
+        self.evict(keep=fingerprint)
+
+    def store_in_background(self, fingerprint, uid, result):
+        threading.Thread(target=self.store, args=(fingerprint, uid, result), daemon=True).start()
+
+    def folders(self):
+        """
+        (last used time, bytes, fingerprint, being written) of every cached folder. A folder
+        is being written while it holds a partial file that is not stale.
+        """
+        folders = []
+        if not os.path.isdir(self.cache_dir):
+            return folders
+        now = time.time()
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if not entry.is_dir():
+                    continue
+                try:
+                    with os.scandir(entry.path) as files:
+                        stats = [(file.name, file.stat()) for file in files if file.is_file()]
+                    used = entry.stat().st_mtime
+                except FileNotFoundError:
+                    # Evicted, or a partial file renamed, while listing; skipped until the next call
+                    continue
+                writing = any(name.endswith(".part") and now - stat.st_mtime < self.STALE_PART_SECONDS
+                              for name, stat in stats)
+                folders.append((used, sum(stat.st_size for _, stat in stats), entry.name, writing))
+        return folders
+
+    def remove_stale_parts(self):
+        """
+        Delete partial files of other processes that were not written to for STALE_PART_SECONDS,
+        left behind when a viewer was killed while storing.
+        """
+        suffix = f".{os.getpid()}.part"
+        now = time.time()
+        for _, _, fingerprint, _ in self.folders():
+            try:
+                with os.scandir(self.folder_dir(fingerprint)) as files:
+                    stale = [file.path for file in files if file.name.endswith(".part") and
+                             not file.name.endswith(suffix) and now - file.stat().st_mtime >= self.STALE_PART_SECONDS]
+                for path in stale:
+                    logging.debug("Removing stale partial file %s", path)
+                    os.remove(path)
+            except FileNotFoundError:
+                continue
+
+    def evict(self, keep=None):
+        with self.lock:
+            folders = sorted(self.folders())
+            total = sum(size for _, size, _, _ in folders)
+            for _, size, fingerprint, writing in folders:
+                if total <= self.max_bytes:
+                    break
+                if fingerprint == keep or writing:
+                    continue
+                logging.debug("Evicting cached volumes %s (%d bytes)", fingerprint, size)
+                shutil.rmtree(self.folder_dir(fingerprint), ignore_errors=True)
+                total -= size
+
+    def stats(self):
+        folders = self.folders()
+        return {"folders": len(folders), "bytes": sum(size for _, size, _, _ in folders), "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,98 @@
+import threading
+import time
+import logging
+from collections import deque
+
+import numpy as np
+
+
+class OrthogonalLayouts:
+    """
+    Optional axis-contiguous copies of a (z, y, x) volume for sagittal and coronal reads.
+    - The sagittal copy is (x, z, y), so copy[x] is one contiguous (z, y) block.
+    - The coronal copy is (y, z, x), so copy[y] is one contiguous (z, x) block.
+    - Copies are built on a background thread, and only while they fit in max_bytes.
+    - Until a copy is ready, or when it does not fit, slices are read strided from the volume.
+    """
+    AXES = {"sagittal": (2, 0, 1), "coronal": (1, 0, 2)}
+    SLICE = {"axial": lambda volume, index: volume[index, :, :],
+             "sagittal": lambda volume, index: volume[:, :, index],
+             "coronal": lambda volume, index: volume[:, index, :]}
+
+    def __init__(self, max_bytes=2 * 1024 ** 3, enabled=False, on_ready=None):
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.on_ready = on_ready
+        self.volume = None
+        self.copies = {}
+        self.generation = 0
+        self.timings = {view: deque(maxlen=64) for view in self.SLICE}
+
+    def set_volume(self, volume):
+        self.generation += 1
+        self.volume = volume
+        self.copies = {}
+        for timings in self.timings.values():
+            timings.clear()
+        if self.enabled and volume is not None:
+            threading.Thread(target=self.build, args=(volume, self.generation), daemon=True).start()
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        self.set_volume(self.volume)
+
+    def build(self, volume, generation):
+        budget = self.max_bytes
+        for view, axes in self.AXES.items():
+            if volume.nbytes > budget:
+                logging.debug("Skipping %s layout: %d bytes over the %d byte limit", view, volume.nbytes, budget)
+                continue
+            source = volume.transpose(axes)
+            copy = np.empty(source.shape, dtype=volume.dtype)
+            # Fill in blocks so a newer volume can abandon the build early
+            for start in range(0, copy.shape[0], 16):
+                if generation != self.generation:
+                    return
+                copy[start:start + 16] = source[start:start + 16]
+            if generation != self.generation:
+                return
+            self.copies = {**self.copies, view: copy}
+            budget -= copy.nbytes
+        if self.on_ready is not None:
+            self.on_ready()
+
+    def extract(self, view, index, volume):
+        start = time.perf_counter()
+        copy = self.copies.get(view) if volume is self.volume else None
+        if copy is not None:
+            image = copy[index]
+        else:
+            image = self.SLICE[view](volume, index)
+            if view != "axial":
+                image = np.ascontiguousarray(image)
+        self.timings[view].append(time.perf_counter() - start)
+        return image
+
+    def block(self, view, start, stop, volume):
+        """
+        Slices start..stop-1 of a view stacked along axis 0, each laid out as extract() returns it.
+        A view into the contiguous copy when it is ready, otherwise a strided view of the volume.
+        """
+        copy = self.copies.get(view) if volume is self.volume else None
+        if copy is not None:
+            return copy[start:stop]
+        if view == "axial":
+            return volume[start:stop]
+        return volume.transpose(self.AXES[view])[start:stop]
+
+    def memory_bytes(self):
+        return sum(copy.nbytes for copy in self.copies.values())
+
+    def stats(self):
+        stats = {"enabled": self.enabled, "memory_bytes": self.memory_bytes(), "max_bytes": self.max_bytes}
+        for view, timings in self.timings.items():
+            stats[view] = {
+                "layout": "contiguous" if view == "axial" or view in self.copies else "strided",
+                "mean_ms": 1000 * sum(timings) / len(timings) if timings else 0.0,
+            }
+        return stats
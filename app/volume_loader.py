@@ -0,0 +1,133 @@
+import threading
+import logging
+
+import numpy as np
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from dicom_loader import scan_dicom_folder, decode_series
+from nifti_backend import NiftiVolume, sample_range
+from volume_cache import CachedSeries, folder_fingerprint
+from label_overlay import compact_labels
+
+
+def center_out_order(count):
+    """
+    Slice indices starting at the middle slice and alternating outwards, so the
+    first image shown is the middle axial slice and the other views fill in evenly.
+    """
+    middle = (count - 1) // 2
+    order = [middle]
+    for step in range(1, count):
+        for index in (middle + step, middle - step):
+            if 0 <= index < count:
+                order.append(index)
+    return order
+
+
+class VolumeLoadWorker(QObject):
+    """
+    Run one loading job on a background thread and report back through Qt signals.
+    - The job is called with the worker and returns the result passed to finished.
+    - Signals are delivered on the GUI thread; cancel() is polled by the job between slices.
+    """
+    allocated = pyqtSignal(object)
+    slice_loaded = pyqtSignal(int, int, int)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, job, parent=None):
+        super().__init__(parent)
+        self.job = job
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    def run(self):
+        try:
+            result = self.job(self)
+        except Exception as e:
+            logging.exception("Volume loading failed")
+            self.failed.emit(str(e))
+            return
+        if self.is_cancelled():
+            self.cancelled.emit()
+        else:
+            self.finished.emit(result)
+
+
+def scan_dicom_job(folder_path, workers, cache, worker):
+    """
+    Read the series headers of a folder. With a volume cache, a folder whose series are all
+    cached is listed from the cache index without reading any file.
+    """
+    if cache is None:
+        return scan_dicom_folder(folder_path, workers)
+    fingerprint = folder_fingerprint(folder_path)
+    series_list = cache.cached_series(folder_path, fingerprint)
+    if series_list is not None:
+        return series_list
+    series_list = scan_dicom_folder(folder_path, workers)
+    for series in series_list:
+        series.fingerprint = fingerprint
+    if series_list:
+        cache.store_index(fingerprint, folder_path, series_list)
+    return series_list
+
+
+def decode_dicom_job(series, workers, use_processes, cache, worker):
+    """
+    Decode a series middle-slice-first into a zero-filled volume that the GUI can display
+    while it fills in.
+    - A series in the volume cache is mapped from it instead; a decoded series is written
+      to the cache in the background.
+    """
+    fingerprint = series.fingerprint if cache is not None else None
+    if fingerprint is not None:
+        result = cache.load(fingerprint, series.uid)
+        if result is not None:
+            return result
+        if isinstance(series, CachedSeries):
+            # Evicted since the folder was listed; read the headers after all
+            matches = [found for found in scan_dicom_folder(series.folder_path, workers) if found.uid == series.uid]
+            if not matches:
+                raise ValueError(f"Series {series.description} is no longer in {series.folder_path}")
+            series = matches[0]
+
+    volume = np.zeros(series.shape, dtype=series.dtype)
+    worker.allocated.emit(volume)
+    value_range = [np.inf, -np.inf]
+
+    def progress(index, done, total):
+        value_range[0] = min(value_range[0], float(volume[index].min()))
+        value_range[1] = max(value_range[1], float(volume[index].max()))
+        worker.slice_loaded.emit(index, done, total)
+
+    decode_series(series, volume, workers=workers, use_processes=use_processes,
+                  order=center_out_order(len(series)), progress=progress, cancelled=worker.is_cancelled)
+    result = {"volume": volume, "value_range": tuple(value_range), "spacing": series.spacing}
+    if fingerprint is not None and not worker.is_cancelled():
+        cache.store_in_background(fingerprint, series.uid, result)
+    return result
+
+
+def read_nifti_job(file_path, cache_dir, cache, worker):
+    nifti = NiftiVolume(file_path, cache_dir, cache)
+    return {"volume": nifti.data, "value_range": sample_range(nifti.data), "spacing": nifti.spacing,
+            "slope": nifti.slope, "intercept": nifti.intercept, "source": nifti, "frame_count": nifti.frame_count}
+
+
+def read_labels_job(file_path, cache_dir, cache, worker):
+    """
+    A NIfTI label map in an 8/16-bit type; the first frame of a time series.
+    """
+    nifti = NiftiVolume(file_path, cache_dir, cache)
+    return {"labels": compact_labels(nifti.data), "source": nifti}
@@ -0,0 +1,114 @@
+import threading
+import time
+import logging
+
+import numpy as np
+
+
+class VolumeStatistics:
+    """
+    Intensity histogram and per-slice minima and maxima of a (z, y, x) volume, gathered in
+    one chunked pass on a background thread.
+    - 8/16-bit integer volumes get one bin per value, counted through their bit pattern as
+      the window/level table indexes them. Other dtypes get BINS bins spread over the value
+      range the loader reported; values outside it are counted in the end bins.
+    - Percentiles and auto windows are answered from the histogram without reading the
+      volume again.
+    - All values are in stored units; slope and intercept are applied by the caller.
+    """
+    BINS = 4096
+
+    def __init__(self, chunk=16, on_ready=None):
+        self.chunk = chunk
+        self.on_ready = on_ready
+        self.volume = None
+        self.generation = 0
+        self.result = None
+
+    @property
+    def ready(self):
+        return self.result is not None
+
+    def set_volume(self, volume, value_range=None, background=True):
+        """
+        Start gathering the statistics of a volume; with background=False they are ready on return.
+        """
+        self.generation += 1
+        self.volume = volume
+        self.result = None
+        if volume is not None:
+            if value_range is None:
+                value_range = (float(np.min(volume)), float(np.max(volume)))
+            if background:
+                threading.Thread(target=self.build, args=(volume, value_range, self.generation), daemon=True).start()
+            else:
+                self.build(volume, value_range, self.generation)
+
+    def build(self, volume, value_range, generation):
+        start_time = time.perf_counter()
+        direct = volume.dtype.kind in "iu" and volume.dtype.itemsize <= 2
+        if direct:
+            unsigned = np.dtype(f"u{volume.dtype.itemsize}")
+            values = np.arange(2 ** (8 * volume.dtype.itemsize), dtype=unsigned).view(volume.dtype)
+        else:
+            low, high = value_range
+            values = np.linspace(low, high, self.BINS)
+            scale = (self.BINS - 1) / (high - low) if high > low else 0.0
+        counts = np.zeros(len(values), dtype=np.int64)
+        slice_min = np.empty(volume.shape[0], dtype=np.float64)
+        slice_max = np.empty(volume.shape[0], dtype=np.float64)
+
+        for start in range(0, volume.shape[0], self.chunk):
+            if generation != self.generation:
+                return
+            block = np.asarray(volume[start:start + self.chunk])
+            slice_min[start:start + len(block)] = block.min(axis=(1, 2))
+            slice_max[start:start + len(block)] = block.max(axis=(1, 2))
+            if direct:
+                index = block.view(unsigned).ravel()
+            else:
+                index = np.subtract(block, low, dtype=np.float32).ravel()
+                np.multiply(index, scale, out=index)
+                np.clip(index, 0, self.BINS - 1, out=index)
+                index = index.astype(np.intp)
+            counts += np.bincount(index, minlength=len(values))
+
+        if direct:
+            # Bit-pattern order puts negative values last; sort the bins by value
+            order = np.argsort(values, kind="stable")
+            values, counts = values[order].astype(np.float64), counts[order]
+        if generation != self.generation:
+            return
+        self.result = {"values": values, "counts": counts, "cumulative": np.cumsum(counts),
+                       "slice_min": slice_min, "slice_max": slice_max,
+                       "value_range": (float(slice_min.min()), float(slice_max.max())),
+                       "seconds": time.perf_counter() - start_time}
+        logging.debug("Volume histogram ready in %.2f s: range %s", self.result["seconds"],
+                      self.result["value_range"])
+        if self.on_ready is not None:
+            self.on_ready()
+
+    @property
+    def value_range(self):
+        """
+        Exact (min, max) of the stored values.
+        """
+        return self.result["value_range"]
+
+    def percentile(self, q):
+        """
+        Stored value below which q percent of the voxels lie, to histogram bin precision.
+        """
+        cumulative = self.result["cumulative"]
+        index = np.searchsorted(cumulative, cumulative[-1] * q / 100.0)
+        return float(self.result["values"][min(index, len(cumulative) - 1)])
+
+    def percentile_window(self, low=1.0, high=99.0):
+        return self.percentile(low), self.percentile(high)
+
+    def stats(self):
+        if self.result is None:
+            return {"ready": False}
+        return {"ready": True, "value_range": self.value_range, "bins": len(self.result["counts"]),
+                "seconds": self.result["seconds"], "p1": self.percentile(1), "p50": self.percentile(50),
+                "p99": self.percentile(99)}
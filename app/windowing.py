@@ -0,0 +1,152 @@
+import numpy as np
+
+
+class WindowLevelLUT:
+    """
+    Map raw volume intensities to 8-bit display values with a lookup table.
+    - The intensity range is computed once per volume, so every slice shares it.
+    - Stored values are rescaled by slope/intercept while the table is built, so
+      unscaled on-disk data can be displayed without converting the volume.
+    - The table is rebuilt only when brightness, contrast or the window change.
+    - The window (low, high) in rescaled units maps to the full display range; it defaults
+      to the whole volume range. Brightness and contrast are applied within it.
+    - 8/16-bit integer slices index the table directly by their bit pattern,
+      other dtypes are quantized into TABLE_SIZE bins first.
+    """
+    TABLE_SIZE = 4096
+    # (center, width) in rescaled units, i.e. Hounsfield units for CT
+    CT_PRESETS = {"soft_tissue": (40, 400), "lung": (-600, 1500), "bone": (400, 1800), "brain": (40, 80)}
+
+    def __init__(self):
+        self.brightness = 1.0
+        self.contrast = 1.0
+        self.vmin = 0.0
+        self.vmax = 0.0
+        self.raw_min = 0.0
+        self.raw_max = 0.0
+        self.slope = 1.0
+        self.intercept = 0.0
+        self.window = None
+        self.dtype = None
+        # (version, table, (dtype, raw_min, raw_max)) is swapped as one tuple, so worker threads
+        # never index a table with slices windowed for another volume
+        self.current = (0, None, None)
+
+    @property
+    def table(self):
+        return self.current[1]
+
+    @property
+    def version(self):
+        return self.current[0]
+
+    def snapshot(self):
+        return self.current
+
+    @staticmethod
+    def dtype_range(dtype):
+        """
+        A neutral value range for a dtype: all of an integer type, 0..1 otherwise.
+        """
+        if dtype.kind in "iu":
+            info = np.iinfo(dtype)
+            return float(info.min), float(info.max)
+        return 0.0, 1.0
+
+    def set_volume(self, volume, value_range=None, slope=1.0, intercept=0.0):
+        """
+        value_range is the (min, max) of the stored values; it is computed when omitted.
+        vmin/vmax are kept in rescaled units. The window is reset to the whole range.
+        """
+        self.dtype = volume.dtype
+        if value_range is None:
+            value_range = (np.min(volume), np.max(volume))
+        self.raw_min, self.raw_max = float(value_range[0]), float(value_range[1])
+        self.slope, self.intercept = float(slope), float(intercept)
+        self.vmin, self.vmax = sorted((self.raw_min * self.slope + self.intercept,
+                                       self.raw_max * self.slope + self.intercept))
+        self.window = None
+        self.rebuild()
+
+    def set_params(self, brightness, contrast):
+        if self.table is not None and (brightness, contrast) == (self.brightness, self.contrast):
+            return False
+        self.brightness = brightness
+        self.contrast = contrast
+        self.rebuild()
+        return True
+
+    def set_window(self, low=None, high=None):
+        """
+        Window in rescaled units; no arguments restore the whole volume range.
+        """
+        window = None if low is None else (float(min(low, high)), float(max(low, high)))
+        if window == self.window:
+            return False
+        self.window = window
+        self.rebuild()
+        return True
+
+    def window_range(self):
+        return self.window or (self.vmin, self.vmax)
+
+    def stored_window(self):
+        """
+        The window in stored units, as the 3D view's transfer functions use them.
+        """
+        low, high = self.window_range()
+        if not self.slope:
+            return self.raw_min, self.raw_max
+        return tuple(sorted(((low - self.intercept) / self.slope, (high - self.intercept) / self.slope)))
+
+    def is_direct(self, dtype=None):
+        dtype = self.dtype if dtype is None else dtype
+        return dtype is not None and dtype.kind in "iu" and dtype.itemsize <= 2
+
+    def table_values(self):
+        if self.is_direct():
+            # Entry i holds the value whose bit pattern is i, so signed data can be
+            # looked up through an unsigned view without any arithmetic.
+            unsigned = np.dtype(f"u{self.dtype.itemsize}")
+            raw = np.arange(2 ** (8 * self.dtype.itemsize), dtype=unsigned).view(self.dtype).astype(np.float64)
+        else:
+            raw = np.linspace(self.raw_min, self.raw_max, self.TABLE_SIZE)
+        return raw * self.slope + self.intercept
+
+    def rebuild(self):
+        if self.dtype is None:
+            return
+        values = self.table_values()
+        low, high = self.window_range()
+        value_range = high - low
+        if value_range > 0:
+            normalized = np.clip((values - low) / value_range, 0, 1)
+        else:
+            normalized = np.zeros_like(values)
+
+        # Gamma correction for brightness (invert brightness to align with perception)
+        gamma = 1 / self.brightness if self.brightness != 0 else 1
+        bright = np.power(normalized, gamma)
+
+        # Scaling for contrast adjustment
+        contrasted = np.clip((bright - 0.5) * self.contrast + 0.5, 0, 1)
+
+        self.current = (self.version + 1, (contrasted * 255).astype(np.uint8), (self.dtype, self.raw_min, self.raw_max))
+
+    def apply(self, image, snapshot=None):
+        """
+        Window a slice with the current table, or with the table of a snapshot() taken earlier.
+        """
+        _, table, quantization = self.current if snapshot is None else snapshot
+        if table is None:
+            return np.zeros(image.shape, dtype=np.uint8)
+        dtype, raw_min, raw_max = quantization
+        if self.is_direct(dtype):
+            return table[image.view(f"u{dtype.itemsize}")]
+
+        value_range = raw_max - raw_min
+        scale = (self.TABLE_SIZE - 1) / value_range if value_range > 0 else 0.0
+        index = np.subtract(image, raw_min, dtype=np.float32)
+        np.multiply(index, scale, out=index)
+        np.clip(index, 0, self.TABLE_SIZE - 1, out=index)
+        return table[index.astype(np.intp)]
@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+nib = pytest.importorskip("nibabel")
+QtGui = pytest.importorskip("PyQt6.QtGui")
+QtWidgets = pytest.importorskip("PyQt6.QtWidgets")
+pytest.importorskip("vtk")
+
+import batch_export  # noqa: E402
+
+
+def qimage_to_array(image):
+    # The converted image may share image's pixels, so image stays referenced until they are copied
+    gray = image.convertToFormat(QtGui.QImage.Format.Format_Grayscale8)
+    bits = gray.constBits()
+    bits.setsize(gray.sizeInBytes())
+    rows = np.frombuffer(bits, dtype=np.uint8).reshape(gray.height(), gray.bytesPerLine())
+    return rows[:, :gray.width()].copy()
+
+
+@pytest.fixture
+def study(tmp_path):
+    # The extremes sit on an odd slice, which the loader's sampled range skips
+    rng = np.random.default_rng(0)
+    voxels = rng.integers(-200, 800, size=(40, 48, 64)).astype(np.int16)
+    voxels[5:15, 10:20, 33] = -1000
+    voxels[20:30, 30:40, 33] = 3000
+    path = tmp_path / "study.nii"
+    nib.save(nib.Nifti1Image(voxels, np.eye(4)), str(path))
+    return str(path)
+
+
+def test_exported_slice_matches_viewer(study, tmp_path, monkeypatch):
+    import MPR
+
+    result = batch_export.export_study(study, str(tmp_path / "export"), slices=[("axial", 33)])
+    exported = qimage_to_array(QtGui.QImage(result["images"][0]))
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    # Only the 2D views are compared; the MPR planes keep volume rendering out of headless runs
+    monkeypatch.setattr(MPR.EnhancedMultiViewMedicalImageViewer, "view_3d_mode", "planes")
+    viewer = MPR.EnhancedMultiViewMedicalImageViewer()
+    viewer.resize(1200, 800)
+    viewer.show()
+    viewer.load_nifti_file(study)
+    deadline = time.time() + 30
+    while time.time() < deadline and not (viewer.volume_complete and viewer.volume_stats.ready and
+                                          viewer.volume_stats.value_range == (viewer.window_level.raw_min,
+                                                                              viewer.window_level.raw_max)):
+        app.processEvents()
+        time.sleep(0.005)
+    assert viewer.window_level.raw_max == 3000
+
+    image = viewer.extract_slice("axial", 33)
+    height, width = image.shape[:2]
+    rendered = qimage_to_array(viewer.render_2d_image(image, "axial", (0, 0, width, height), (width, height)))
+    viewer.close()
+    np.testing.assert_array_equal(exported, rendered)